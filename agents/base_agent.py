@@ -6,8 +6,9 @@ from pathlib import Path
 import gc
 
 class BaseAgent(ABC):
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, compile_model: bool = False):
         self.model_path = model_path
+        self.compile_model = compile_model
         self.model = None
         self.tokenizer = None
         self.cache_dir = Path("/root/autodl-tmp/model_cache")
@@ -30,9 +31,7 @@ class BaseAgent(ABC):
                 # 配置 8-bit 量化
                 quantization_config = BitsAndBytesConfig(
                     load_in_8bit=True,
-                    bnb_4bit_compute_dtype=torch.float16,
-                    bnb_4bit_use_double_quant=True,
-                    bnb_4bit_quant_type="nf4"
+                    llm_int8_threshold=6.0
                 )
                 
                 # 设置设备映射，启用多 GPU
@@ -70,13 +69,12 @@ class BaseAgent(ABC):
                 if self.tokenizer.pad_token is None:
                     self.tokenizer.pad_token = self.tokenizer.eos_token
                 
-                # 启用梯度检查点以节省内存
-                if hasattr(self.model, "gradient_checkpointing_enable"):
-                    self.model.gradient_checkpointing_enable()
-                
                 # 配置生成参数
                 if hasattr(self.model, "config"):
                     self.model.config.use_cache = True
+                
+                if self.compile_model:
+                    self._compile_model()
                     
                 print("模型加载完成！")
                 self.clean_gpu_memory()
@@ -88,6 +86,46 @@ class BaseAgent(ABC):
                 self.clean_gpu_memory()
                 raise e
     
+    def _compile_model(self):
+        """用 torch.compile 编译前向计算并预热，编译失败时退回 eager 模式"""
+        if not hasattr(torch, "compile"):
+            return
+        eager_forward = self.model.forward
+        try:
+            # dynamic=True 避免每种输入长度都重新编译
+            compiled_forward = torch.compile(
+                eager_forward,
+                mode="reduce-overhead",
+                fullgraph=False,
+                dynamic=True
+            )
+            
+            def forward(*args, **kwargs):
+                # 新的输入长度可能在请求中触发重新编译或 CUDA 图录制，失败时换回 eager 并重算本次调用
+                try:
+                    return compiled_forward(*args, **kwargs)
+                except torch.cuda.OutOfMemoryError:
+                    raise
+                except Exception as e:
+                    print(f"编译后的前向计算失败，退回 eager 模式: {str(e)}")
+                    self.model.forward = eager_forward
+                    return eager_forward(*args, **kwargs)
+                    
+            self.model.forward = forward
+            # 编译在首次调用时进行，先预热一次，避免第一个请求承担编译耗时
+            inputs = self.tokenizer("预热", return_tensors="pt").to(self.model.device)
+            with torch.inference_mode():
+                self.model.generate(
+                    **inputs,
+                    max_new_tokens=8,
+                    pad_token_id=self.tokenizer.pad_token_id
+                )
+            print("模型编译完成")
+        except Exception as e:
+            # 旧版 torch 与 bitsandbytes 量化层可能无法编译
+            print(f"模型编译失败，使用 eager 模式: {str(e)}")
+            self.model.forward = eager_forward
+    
     @abstractmethod
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理输入数据的抽象方法，必须由子类实现"""
@@ -13,14 +13,14 @@ class KnowledgeAgent(BaseAgent):
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         query = input_data.get("query", "")
         # 从向量存储中检索相关上下文
-        context = self.vector_store.search(query)
+        context = await self.vector_store.search(query)
         
         return {
             "context": context
         }
         
     def _build_context(self, docs: List[Dict[str, Any]]) -> str:
-        return "\n".join([doc.page_content for doc in docs])
+        return "\n".join([doc["content"] for doc in docs])
         
     async def _generate_response(self, query: str, context: str) -> str:
         prompt = f"基于以下参考信息回答问题：\n\n{context}\n\n问题：{query}\n回答："
@@ -1,5 +1,7 @@
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+import asyncio
+import threading
 import torch
 import gc
 from knowledge_base.knowledge_manager import KnowledgeManager
@@ -7,9 +9,11 @@ import re
 
 class ReportGenerationAgent(BaseAgent):
     def __init__(self, config):
-        super().__init__(config.BASE_MODEL_NAME)
+        super().__init__(config.BASE_MODEL_NAME, config.MODEL_CONFIG.get("compile", False))
         self.config = config
         self.chunk_size = config.MODEL_CONFIG.get("chunk_size", 256)
+        # generate 在线程池中执行，同一模型上的 generate（及 CUDA 图回放）不可并发，逐个执行
+        self._generate_lock = threading.Lock()
         # 初始化时加载模型
         self.load_model()
         # 添加知识库管理器
@@ -20,8 +24,6 @@ class ReportGenerationAgent(BaseAgent):
             # 确保模型已加载
             if self.model is None:
                 self.load_model()
-                
-            self.clean_memory()
             
             # 分词处理
             inputs = self.tokenizer(
@@ -37,7 +39,7 @@ class ReportGenerationAgent(BaseAgent):
             inputs = {k: v.to(device) for k, v in inputs.items()}
             
             # 使用 torch.amp.autocast 替代 torch.cuda.amp.autocast
-            with torch.inference_mode(), torch.amp.autocast('cuda'):
+            with self._generate_lock, torch.inference_mode(), torch.amp.autocast('cuda'):
                 outputs = self.model.generate(
                     **inputs,
                     max_new_tokens=256,
@@ -59,15 +61,13 @@ class ReportGenerationAgent(BaseAgent):
                 clean_up_tokenization_spaces=True
             )
             
-            # 清理内存
-            del inputs, outputs
-            self.clean_memory()
-            
             return response
             
         except Exception as e:
             print(f"生成报告时出错: {str(e)}")
-            self.clean_memory()
+            # 缓存分配器会复用已释放的显存，只在显存不足时才归还
+            if "out of memory" in str(e):
+                self.clean_memory()
             return f"生成失败: {str(e)}"
     
     def clean_memory(self):
@@ -116,8 +116,8 @@ class ReportGenerationAgent(BaseAgent):
                 treatment_plan
             )
             
-            # 7. 生成最终报告
-            report = self.generate(prompt)
+            # 7. 生成最终报告（阻塞的模型推理放到线程中，不占用事件循环）
+            report = await asyncio.to_thread(self.generate, prompt)
             
             return {
                 "status": "success",
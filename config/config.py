@@ -39,6 +39,7 @@ class Config:
         "low_cpu_mem_usage": True,
         "load_in_8bit": True,
         "use_cache": True,
+        "compile": False,  # 使用 torch.compile 编译生成模型，失败时自动退回 eager
         "max_length": 512,
         "chunk_size": 256,
         "trust_remote_code": True
@@ -68,11 +69,15 @@ class Config:
         "weight_decay": 0.01,
         "warmup_steps": 100,
         "max_length": 512,
-        "gradient_accumulation_steps": 8,  # 增加梯度累积步数
+        "global_batch_size": 16,  # 每次参数更新的总样本数，由小批次 × 梯度累积 × GPU 数凑成
         "fp16": True,  # 使用混合精度训练
         "logging_steps": 10,
         "save_steps": 100,
-        "max_grad_norm": 0.5  # 添加梯度裁剪
+        "max_grad_norm": 0.5,  # 添加梯度裁剪
+        "tokenize_num_proc": 8,  # 多进程分词，绕开 GIL
+        "compile_regions": False,  # 编译 MLP 与 RMSNorm 子模块
+        "dataloader_num_workers": 4,  # 后台进程组批，与 GPU 计算重叠
+        "dataloader_prefetch_factor": 4  # 每个 worker 预取的批次数
     }
     
     # 知识库配置
@@ -80,7 +85,13 @@ class Config:
         "chunk_size": 1000,
         "chunk_overlap": 200,
         "top_k": 5,
-        "similarity_threshold": 0.7,
+        "similarity_threshold": 0.7,  # 余弦相似度下限
+        "index_type": None,  # faiss.index_factory 描述串，如 "Flat"、"IVF256,SQ8"、"IVF256,PQ48x8"；None 时按文档数自动选择
+        "nprobe": 16,  # IVF 索引每次检索扫描的簇数
+        "faiss_gpu": True,  # 有 GPU 时把检索索引复制到 GPU
+        # 与已缓存查询的余弦相似度达到该值时直接复用结果；None 为关闭，只复用完全相同的查询。
+        # 英文向量模型对中文短查询区分度有限，不同药物、数值的查询也可能超过阈值，谨慎开启
+        "query_cache_similarity": None,
         "storage_path": BASE_DIR / "storage",
         "vector_dim": 768,  # 向量维度
         "max_tokens": 2048  # 每个文档的最大token数
@@ -91,8 +102,16 @@ class Config:
         "nih_base_url": "https://www.nih.gov",
         "pubmed_base_url": "https://pubmed.ncbi.nlm.nih.gov",
         "max_retries": 3,
+        "retry_delay": 1.0,  # 重试的初始退避时间（秒），每次翻倍
         "timeout": 30,
-        "delay": 2.0,
+        # 每个主机的限速 (max_rate, time_period)：time_period 秒内最多 max_rate 次请求，各主机独立限速；
+        # max_rate 同时也是瞬时突发上限，周期取短一些，避免启动时一次放出整分钟的配额
+        "rate_limits": {
+            "default": (1, 2),  # 每分钟约 30 次
+            "eutils.ncbi.nlm.nih.gov": (3, 1)  # NCBI 无 API key 时上限 3 次/秒
+        },
+        "cache_path": Path("/root/autodl-tmp/medical_ai_system/crawler_cache.sqlite"),
+        "cache_expire_after": 3600,  # HTTP 响应缓存有效期（秒）
         "headers": {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
@@ -116,5 +135,6 @@ class Config:
         "diseases": STORAGE_ROOT / "diseases.jsonl",
         "templates": STORAGE_ROOT / "templates",
         "embeddings": STORAGE_ROOT / "embeddings",
+        "onnx_encoder": STORAGE_ROOT / "embeddings" / "minilm_onnx",  # scripts/export_encoder.py 导出的句向量模型
         "raw_data": STORAGE_ROOT / "raw_data"
     }
\ No newline at end of file
@@ -0,0 +1,37 @@
+import aiohttp
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from pathlib import Path
+from typing import Optional
+
+# 进程内共享的会话，复用 TCP/TLS 连接与 DNS 缓存
+_session: Optional[CachedSession] = None
+
+async def get_session(config) -> CachedSession:
+    """返回共享的异步会话（带磁盘 HTTP 缓存），首次调用时创建"""
+    global _session
+    if _session is None or _session.closed:
+        crawler_config = config.CRAWLER_CONFIG
+        cache_path = Path(crawler_config["cache_path"])
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache = SQLiteBackend(
+            cache_name=str(cache_path),
+            expire_after=crawler_config["cache_expire_after"],
+            allowed_codes=(200, 404),  # 404 也缓存，避免反复请求不存在的页面
+            cache_control=True  # 遵循服务端 Cache-Control / ETag / Last-Modified
+        )
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=10,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(total=crawler_config["timeout"], connect=10)
+        _session = CachedSession(cache=cache, connector=connector, timeout=timeout)
+    return _session
+
+async def close_session():
+    """关闭共享会话，在程序退出前调用"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
@@ -1,464 +1,560 @@
 import aiohttp
+import aiofiles
 import asyncio
-from bs4 import BeautifulSoup
-import json
-from pathlib import Path
-from typing import List, Dict, Any
+from aiolimiter import AsyncLimiter
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
+from cssselect import HTMLTranslator
+import orjson
+from crawlers.http_client import get_session
+from typing import List, Dict, Any, AsyncIterator, Optional
 import logging
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import partial
+from contextlib import asynccontextmanager
+import io
+import mmap
+import os
 import re
-from urllib.parse import quote
+import time
+import uuid
+from urllib.parse import quote, urlparse
 
 logger = logging.getLogger(__name__)
 
+# HTML 检索结果页的声明式描述，由 MedicalCrawler._crawl_generic 统一抓取
+#   url / link_base: 可引用 {q}（已编码的关键词）及 CRAWLER_CONFIG 中的键
+#   item: 条目容器；title: 条目标题；link: 标题内链接（None 表示标题本身即链接）
+#   fields: 输出字段 -> 条目内选择器；extra: 附加的固定字段
+SOURCE_SPECS = {
+    'pubmed': {
+        'label': 'PubMed',
+        'source': 'PubMed',
+        'url': '{pubmed_base_url}/?term={q}',
+        'link_base': '{pubmed_base_url}',
+        'item': 'article.full-docsum',
+        'title': 'a.docsum-title',
+        'link': None,
+        'fields': {'abstract': 'div.full-view-snippet', 'authors': 'span.docsum-authors'}
+    },
+    'who': {
+        'label': 'WHO',
+        'source': 'WHO',
+        'url': 'https://www.who.int/publications/i/search?query={q}',
+        'link_base': 'https://www.who.int',
+        'item': 'div.search-results__item',
+        'title': 'h3.search-results__item-title',
+        'link': 'a',
+        'fields': {
+            'content': 'div.search-results__item-description',
+            'publication_date': 'div.search-results__item-date'
+        }
+    },
+    'cdc': {
+        'label': 'CDC',
+        'source': 'CDC',
+        'url': 'https://www.cdc.gov/search/?query={q}',
+        'link_base': 'https://www.cdc.gov',
+        'item': 'div.searchResults',
+        'title': 'h3.item-title',
+        'link': 'a',
+        'fields': {'content': 'div.item-description'}
+    },
+    'books': {
+        'label': '医学书籍',
+        'source': 'Medical Books',
+        'url': 'https://www.ncbi.nlm.nih.gov/books/search?term={q}',
+        'link_base': 'https://www.ncbi.nlm.nih.gov',
+        'item': 'div.rslt',
+        'title': 'a.title',
+        'link': None,
+        'fields': {'authors': 'div.authors', 'summary': 'div.desc'},
+        'extra': {'type': 'book'}
+    },
+    'guidelines': {
+        'label': '诊疗指南',
+        'source': 'Medical Guidelines',
+        'url': 'https://www.guidelines.gov/search?term={q}',
+        'link_base': '',
+        'item': 'div.guideline-item',
+        'title': 'h3.guideline-title',
+        'link': 'a',
+        'fields': {'organization': 'div.organization', 'content': 'div.guideline-content'},
+        'extra': {'type': 'guideline'}
+    },
+    'wiki': {
+        'label': '医学百科',
+        'source': 'Medical Encyclopedia',
+        'url': 'https://medlineplus.gov/encyclopedia.html?search={q}',
+        'link_base': '',
+        'item': 'div.encyclopedia-item',
+        'title': 'h2.title',
+        'link': 'a',
+        'fields': {'content': 'div.content'},
+        'extra': {'type': 'wiki'}
+    }
+}
+
+def _compile_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """将数据源描述中的 CSS 选择器编译一次"""
+    return {
+        # 条目容器编译为针对当前节点的 XPath，用于流式解析时判断闭合的元素
+        'item': etree.XPath(HTMLTranslator().css_to_xpath(spec['item'], prefix='self::')),
+        'title': CSSSelector(spec['title']),
+        'link': CSSSelector(spec['link']) if spec['link'] else None,
+        'fields': {field: CSSSelector(css) for field, css in spec['fields'].items()}
+    }
+
+def fast_line_count(path) -> int:
+    """统计 JSONL 文件的记录数：内存映射后直接数换行符，不逐行解码"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0  # 空文件无法 mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.count(b'\n')
+
 class MedicalCrawler:
+    # PubMed efetch XML 的字段提取表达式，类加载时编译一次，所有文章复用
+    _xp = {
+        'pmid': etree.XPath('string(.//PMID)', smart_strings=False),
+        'title': etree.XPath('string(.//ArticleTitle)', smart_strings=False),
+        'abstract': etree.XPath('string(.//Abstract)', smart_strings=False),
+        'authors': etree.XPath('.//AuthorList/Author'),
+        'year': etree.XPath('string(.//PubDate/Year)', smart_strings=False),
+        'month': etree.XPath('string(.//PubDate/Month)', smart_strings=False),
+        'day': etree.XPath('string(.//PubDate/Day)', smart_strings=False)
+    }
+    
+    _EUTILS = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    
+    # 各数据源编译后的选择器，类加载时编译，所有页面复用
+    _selectors = {name: _compile_spec(spec) for name, spec in SOURCE_SPECS.items()}
+    
+    # (数据源, 关键词) -> (过期时间, 记录)；类级共享，键中不含实例，缓存不会把爬虫实例留在内存里
+    FETCH_TTL = 3600
+    FETCH_CACHE_SIZE = 4096
+    _fetch_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    # 正在进行的抓取，并发的相同请求共用同一个任务
+    _fetch_inflight: Dict[tuple, asyncio.Task] = {}
+    
     def __init__(self, config):
         self.config = config
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xml',
+            'Accept-Encoding': 'gzip, deflate, br'  # aiohttp 自动解压，br 需要安装 brotli
         }
         self.session = None
+        self._timestamp = None
+        self._write_q = None
+        self._writer_task = None
+        self._counts = Counter()
+        self._host_limiters: Dict[str, AsyncLimiter] = {}
         
     async def initialize(self):
-        """初始化异步会话"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        """获取共享的异步会话并启动写入协程"""
+        self.session = await get_session(self.config)
+        
+        # 启动单一写入协程，爬取过程中边抓取边落盘
+        self._timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._write_q = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
         
     async def close(self):
-        """关闭会话"""
-        if self.session:
-            await self.session.close()
+        """等待写入完成（共享会话由 http_client.close_session 统一关闭）"""
+        if self._writer_task:
+            # 发送结束标记，等待队列中剩余记录写完
+            await self._write_q.put(None)
+            await self._writer_task
+            self._writer_task = None
             
-    async def crawl_nih(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """从 NIH 爬取医疗数据"""
-        results = []
-        base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    def _emit(self, source: str, record: Dict[str, Any]):
+        """将一条记录交给写入协程"""
+        self._write_q.put_nowait((source, record))
         
-        headers = self.config.CRAWLER_CONFIG["headers"]
+    async def _writer_loop(self):
+        """从队列中取出记录，按数据源批量追加到 JSONL 文件（每个数据源只打开一个文件句柄）"""
+        raw_data_path = self.config.STORAGE_PATHS["raw_data"]
+        raw_data_path.mkdir(parents=True, exist_ok=True)
+        files = {}
         
-        for keyword in keywords:
-            try:
-                # 使用 E-utilities API 搜索
-                search_url = f"{base_url}/esearch.fcgi?db=pubmed&term={quote(keyword)}&retmode=json&retmax=10"
-                print(f"正在爬取 NIH E-utilities: {search_url}")
-                
-                async with self.session.get(search_url, headers=headers, timeout=30) as response:
-                    if response.status == 200:
-                        try:
-                            data = await response.json()
-                            id_list = data.get('esearchresult', {}).get('idlist', [])
-                            print(f"找到 {len(id_list)} 篇文章")
-                            
-                            if id_list:
-                                # 获取文章详情
-                                ids = ','.join(id_list)
-                                summary_url = f"{base_url}/efetch.fcgi?db=pubmed&id={ids}&retmode=xml"
-                                
-                                async with self.session.get(summary_url, headers=headers) as summary_response:
-                                    if summary_response.status == 200:
-                                        xml_content = await summary_response.text()
-                                        soup = BeautifulSoup(xml_content, 'xml')
-                                        articles = soup.find_all('PubmedArticle')
-                                        
-                                        for article in articles:
-                                            try:
-                                                # 提取文章ID
-                                                article_id = article.find('PMID').text if article.find('PMID') else None
-                                                
-                                                if article_id:
-                                                    # 提取标题
-                                                    title = article.find('ArticleTitle')
-                                                    title_text = title.text if title else ''
-                                                    
-                                                    # 提取摘要
-                                                    abstract = article.find('Abstract')
-                                                    abstract_text = abstract.text if abstract else ''
-                                                    
-                                                    # 提取作者
-                                                    authors = []
-                                                    author_list = article.find('AuthorList')
-                                                    if author_list:
-                                                        for author in author_list.find_all('Author'):
-                                                            last_name = author.find('LastName')
-                                                            fore_name = author.find('ForeName')
-                                                            if last_name and fore_name:
-                                                                authors.append(f"{fore_name.text} {last_name.text}")
-                                                            elif last_name:
-                                                                authors.append(last_name.text)
-                                                    
-                                                    # 提取发布日期
-                                                    pub_date = article.find('PubDate')
-                                                    year = pub_date.find('Year').text if pub_date and pub_date.find('Year') else ''
-                                                    month = pub_date.find('Month').text if pub_date and pub_date.find('Month') else ''
-                                                    day = pub_date.find('Day').text if pub_date and pub_date.find('Day') else ''
-                                                    publication_date = f"{year} {month} {day}".strip()
-                                                    
-                                                    data = {
-                                                        'title': title_text,
-                                                        'content': abstract_text,
-                                                        'url': f"https://pubmed.ncbi.nlm.nih.gov/{article_id}/",
-                                                        'source': 'NIH PubMed',
-                                                        'source_info': ', '.join(authors) if authors else 'Unknown',
-                                                        'keyword': keyword,
-                                                        'crawl_time': datetime.now().isoformat(),
-                                                        'publication_date': publication_date
-                                                    }
-                                                    
-                                                    results.append(data)
-                                                    print(f"已爬取文章: {data['title'][:50]}...")
-                                                    
-                                            except Exception as e:
-                                                print(f"处理文章时出错: {str(e)}")
-                                                print(f"错误类型: {type(e)}")
-                                                continue
-                                    else:
-                                        print(f"获取文章详情失败，状态码: {summary_response.status}")
-                                        
-                        except Exception as e:
-                            print(f"解析响应失败: {str(e)}")
-                            print(f"错误类型: {type(e)}")
-                            
-                    else:
-                        print(f"请求失败，状态码: {response.status}")
-                        print(await response.text())
-                        
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取 NIH 关键词 {keyword} 失败: {str(e)}")
-                print(f"错误类型: {type(e)}")
-                import traceback
-                print(f"错误堆栈: {traceback.format_exc()}")
-                continue
-                
-        return results
+        try:
+            done = False
+            while not done:
+                # 取出一条后顺带取走队列中已积压的记录，合并为一次写入
+                batch = [await self._write_q.get()]
+                while not self._write_q.empty():
+                    batch.append(self._write_q.get_nowait())
+                    
+                buffers = {}
+                for item in batch:
+                    if item is None:
+                        done = True
+                        continue
+                    source, record = item
+                    buffers.setdefault(source, []).append(orjson.dumps(record))
+                    
+                for source, lines in buffers.items():
+                    f = files.get(source)
+                    if f is None:
+                        filename = f'{source}_{self._timestamp}.jsonl'
+                        f = files[source] = await aiofiles.open(raw_data_path / filename, 'ab')
+                    await f.write(b'\n'.join(lines) + b'\n')
+                    self._counts[source] += len(lines)
+        finally:
+            for f in files.values():
+                await f.close()
+            
+    async def _throttle(self, url: str):
+        """按主机令牌桶限速，只在超出该主机配额时等待"""
+        host = urlparse(url).netloc
+        limiter = self._host_limiters.get(host)
+        if limiter is None:
+            rate_limits = self.config.CRAWLER_CONFIG["rate_limits"]
+            max_rate, time_period = rate_limits.get(host, rate_limits["default"])
+            limiter = self._host_limiters[host] = AsyncLimiter(max_rate, time_period)
+        await limiter.acquire()
         
-    async def crawl_pubmed(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """从 PubMed 爬取医学文献"""
-        results = []
-        base_url = self.config.CRAWLER_CONFIG["pubmed_base_url"]
+    def _retry_wait(self, response, attempt: int) -> Optional[float]:
+        """限流或服务端错误时返回重试前需等待的秒数，否则返回 None"""
+        if response.status != 429 and response.status < 500:
+            return None
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.config.CRAWLER_CONFIG["retry_delay"] * 2 ** attempt
         
-        for keyword in keywords:
+    @asynccontextmanager
+    async def fetch(self, url: str, method: str = 'GET', headers: Optional[Dict[str, str]] = None, **kwargs):
+        """统一的请求入口：按主机限速，网络错误及 429/5xx 时指数退避重试"""
+        max_retries = self.config.CRAWLER_CONFIG["max_retries"]
+        for attempt in range(max_retries + 1):
+            await self._throttle(url)
             try:
-                # 使用英文关键词构建URL
-                search_url = f"{base_url}/?term={quote(keyword.replace(' ', '+'))}"
-                print(f"正在爬取 PubMed: {search_url}")
-                
-                async with self.session.get(search_url) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # 提取搜索结果
-                        articles = soup.find_all('article', class_='full-docsum')
-                        print(f"找到 {len(articles)} 篇文献")
-                        
-                        for article in articles:
-                            try:
-                                title_elem = article.find('a', class_='docsum-title')
-                                abstract_elem = article.find('div', class_='full-view-snippet')
-                                authors_elem = article.find('span', class_='docsum-authors')
-                                
-                                if title_elem:
-                                    data = {
-                                        'title': title_elem.text.strip(),
-                                        'abstract': abstract_elem.text.strip() if abstract_elem else "",
-                                        'authors': authors_elem.text.strip() if authors_elem else "",
-                                        'url': base_url + title_elem['href'] if title_elem.has_attr('href') else "",
-                                        'source': 'PubMed',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat()
-                                    }
-                                    results.append(data)
-                                    
-                            except Exception as e:
-                                print(f"处理文献时出错: {str(e)}")
-                                continue
-                                
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取 PubMed 关键词 {keyword} 失败: {str(e)}")
-                continue
-                
-        return results
+                response = await self.session.request(method, url, headers=headers or self.headers, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == max_retries:
+                    raise
+                wait = self.config.CRAWLER_CONFIG["retry_delay"] * 2 ** attempt
+                logger.debug("请求 %s 出错 (%r)，%.1f 秒后重试", url, e, wait)
+            else:
+                wait = self._retry_wait(response, attempt)
+                if wait is None or attempt == max_retries:
+                    break
+                response.release()
+                logger.debug("请求 %s 返回 %s，%.1f 秒后重试", url, response.status, wait)
+            await asyncio.sleep(wait)
+            
+        try:
+            yield response
+        finally:
+            response.release()
+            
+    @staticmethod
+    def _closed_items(parser, match):
+        """取出解析器中已闭合且匹配的条目元素，使用后释放其子树"""
+        for _, el in parser.read_events():
+            if match(el):
+                yield el
+                el.clear()
+                # 删除已处理的前序兄弟节点，保持内存占用恒定
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+                    
+    async def _iter_items(self, response, source: str):
+        """边接收响应边增量解析 HTML，逐个产出闭合的条目元素"""
+        parser = etree.HTMLPullParser(events=('end',))
+        parser.set_element_class_lookup(lxml_html.HtmlElementClassLookup())
+        match = self._selectors[source]['item']
         
-    async def crawl_who(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """从世界卫生组织网站爬取数据"""
-        results = []
-        base_url = "https://www.who.int/publications/i/search"
+        async for chunk in response.content.iter_chunked(32768):
+            parser.feed(chunk)
+            for el in self._closed_items(parser, match):
+                yield el
+        parser.close()
+        for el in self._closed_items(parser, match):
+            yield el
+            
+    @staticmethod
+    def _first(selector: CSSSelector, element):
+        """返回选择器在元素内的第一个匹配节点"""
+        nodes = selector(element)
+        return nodes[0] if nodes else None
         
-        for keyword in keywords:
-            try:
-                search_url = f"{base_url}?query={quote(keyword)}"
-                print(f"正在爬取 WHO: {search_url}")
-                
-                async with self.session.get(search_url, headers=self.headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        articles = soup.find_all('div', class_='search-results__item')
-                        print(f"找到 {len(articles)} 篇文章")
-                        
-                        for article in articles:
-                            try:
-                                title = article.find('h3', class_='search-results__item-title')
-                                abstract = article.find('div', class_='search-results__item-description')
-                                date = article.find('div', class_='search-results__item-date')
-                                
-                                if title:
-                                    data = {
-                                        'title': title.text.strip(),
-                                        'content': abstract.text.strip() if abstract else "",
-                                        'url': "https://www.who.int" + title.find('a')['href'] if title.find('a') else "",
-                                        'source': 'WHO',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat(),
-                                        'publication_date': date.text.strip() if date else ""
-                                    }
-                                    results.append(data)
-                                    
-                            except Exception as e:
-                                print(f"处理 WHO 文章时出错: {str(e)}")
-                                continue
-                                
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取 WHO 关键词 {keyword} 失败: {str(e)}")
-                continue
-                
-        return results
+    @staticmethod
+    def _text(selector: CSSSelector, element) -> str:
+        """返回选择器第一个匹配节点的文本，未匹配时返回空字符串"""
+        nodes = selector(element)
+        return nodes[0].text_content().strip() if nodes else ""
         
-    async def crawl_cdc(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """从疾病控制中心网站爬取数据"""
+    async def fetch_json(self, url: str, **kwargs) -> Optional[Any]:
+        """请求 JSON 接口，直接用 orjson 解码响应字节；失败时返回 None"""
+        async with self.fetch(url, **kwargs) as response:
+            if response.status != 200:
+                logger.warning("请求失败，状态码: %s", response.status)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("响应内容: %s", await response.text())
+                return None
+            # 缓存命中返回的 CachedResponse.json 会忽略 loads 参数，统一读取字节后自行解码
+            return orjson.loads(await response.read())
+            
+    async def _eutils_search(self, db: str, keyword: str) -> List[str]:
+        """调用 esearch，返回匹配的文章 ID 列表"""
+        search_url = f"{self._EUTILS}/esearch.fcgi?db={db}&term={quote(keyword)}&retmode=json&retmax=10"
+        logger.debug("正在爬取 NIH E-utilities: %s", search_url)
+        data = await self.fetch_json(search_url, headers=self.config.CRAWLER_CONFIG["headers"])
+        if data is None:
+            return []
+        id_list = data.get('esearchresult', {}).get('idlist', [])
+        logger.debug("找到 %d 篇文章", len(id_list))
+        return id_list
+        
+    def _parse_efetch(self, body: bytes, keyword: str, crawl_ts: str) -> List[Dict[str, Any]]:
+        """流式解析 efetch 返回的 PubMed XML，每篇文章处理完即释放，不构建整棵树"""
+        xp = self._xp
         results = []
-        base_url = "https://www.cdc.gov/search"
+        parse_errors = 0
         
-        for keyword in keywords:
+        for _, article in etree.iterparse(io.BytesIO(body), events=('end',), tag='PubmedArticle'):
             try:
-                search_url = f"{base_url}/?query={quote(keyword)}"
-                print(f"正在爬取 CDC: {search_url}")
-                
-                async with self.session.get(search_url, headers=self.headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        articles = soup.find_all('div', class_='searchResults')
-                        print(f"找到 {len(articles)} 篇文章")
-                        
-                        for article in articles:
-                            try:
-                                title = article.find('h3', class_='item-title')
-                                summary = article.find('div', class_='item-description')
-                                
-                                if title:
-                                    data = {
-                                        'title': title.text.strip(),
-                                        'content': summary.text.strip() if summary else "",
-                                        'url': "https://www.cdc.gov" + title.find('a')['href'] if title.find('a') else "",
-                                        'source': 'CDC',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat()
-                                    }
-                                    results.append(data)
-                                    
-                            except Exception as e:
-                                print(f"处理 CDC 文章时出错: {str(e)}")
-                                continue
-                                
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取 CDC 关键词 {keyword} 失败: {str(e)}")
-                continue
+                # 提取文章ID
+                article_id = xp['pmid'](article)
                 
+                if article_id:
+                    # 提取作者
+                    authors = [
+                        f"{author.findtext('ForeName', '')} {last_name}".lstrip()
+                        for author in xp['authors'](article)
+                        if (last_name := author.findtext('LastName'))
+                    ]
+                    
+                    # 提取发布日期
+                    publication_date = f"{xp['year'](article)} {xp['month'](article)} {xp['day'](article)}".strip()
+                    
+                    results.append({
+                        'title': xp['title'](article),
+                        'content': xp['abstract'](article),
+                        'url': f"https://pubmed.ncbi.nlm.nih.gov/{article_id}/",
+                        'source': 'NIH PubMed',
+                        'source_info': ', '.join(authors) or 'Unknown',
+                        'keyword': keyword,
+                        'crawl_time': crawl_ts,
+                        'publication_date': publication_date
+                    })
+                    
+            except Exception:
+                parse_errors += 1
+            finally:
+                article.clear()
+                while article.getprevious() is not None:
+                    del article.getparent()[0]
+                    
+        if parse_errors:
+            logger.warning("NIH 关键词 %s: %d 篇文章解析失败", keyword, parse_errors)
         return results
         
-    async def crawl_medical_books(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """爬取专业医疗健康书籍信息"""
-        results = []
-        base_url = "https://www.ncbi.nlm.nih.gov/books"
+    async def _eutils_fetch(self, db: str, id_list: List[str], keyword: str, crawl_ts: str) -> List[Dict[str, Any]]:
+        """调用 efetch 获取文章详情；较大的响应放到线程中解析，避免阻塞事件循环"""
+        summary_url = f"{self._EUTILS}/efetch.fcgi?db={db}&id={','.join(id_list)}&retmode=xml"
         
-        for keyword in keywords:
+        async with self.fetch(summary_url, headers=self.config.CRAWLER_CONFIG["headers"]) as summary_response:
+            if summary_response.status != 200:
+                logger.warning("获取文章详情失败，状态码: %s", summary_response.status)
+                return []
+            body = await summary_response.read()
+            
+        if len(body) > 50 * 1024:
+            return await asyncio.to_thread(self._parse_efetch, body, keyword, crawl_ts)
+        return self._parse_efetch(body, keyword, crawl_ts)
+        
+    async def crawl_nih(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """从 NIH 爬取医疗数据：各关键词并发 esearch，拿到 ID 后立即发起 efetch"""
+        crawl_ts = datetime.now().isoformat()  # 同一批次共用抓取时间
+        
+        async def search_and_fetch(keyword: str) -> List[Dict[str, Any]]:
             try:
-                search_url = f"{base_url}/search?term={quote(keyword)}"
-                print(f"正在爬取医学书籍: {search_url}")
+                id_list = await self._eutils_search('pubmed', keyword)
+                if not id_list:
+                    return []
+                return await self._eutils_fetch('pubmed', id_list, keyword, crawl_ts)
+            except Exception:
+                logger.exception("爬取 NIH 关键词 %s 失败", keyword)
+                return []
                 
-                async with self.session.get(search_url, headers=self.headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        books = soup.find_all('div', class_='rslt')
-                        print(f"找到 {len(books)} 本相关书籍")
-                        
-                        for book in books:
-                            try:
-                                title = book.find('a', class_='title')
-                                authors = book.find('div', class_='authors')
-                                summary = book.find('div', class_='desc')
-                                
-                                if title:
-                                    data = {
-                                        'title': title.text.strip(),
-                                        'authors': authors.text.strip() if authors else "",
-                                        'summary': summary.text.strip() if summary else "",
-                                        'url': "https://www.ncbi.nlm.nih.gov" + title['href'] if title.has_attr('href') else "",
-                                        'source': 'Medical Books',
-                                        'type': 'book',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat()
-                                    }
-                                    results.append(data)
-                                    
-                            except Exception as e:
-                                print(f"处理书籍数据时出错: {str(e)}")
-                                continue
-                                
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取医学书籍关键词 {keyword} 失败: {str(e)}")
-                continue
+        for future in asyncio.as_completed([search_and_fetch(keyword) for keyword in keywords]):
+            for data in await future:
+                yield data
+                logger.debug("已爬取文章: %.50s", data['title'])
                 
-        return results
-        
-    async def crawl_medical_guidelines(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """爬取诊疗指南和案例"""
-        results = []
-        base_url = "https://www.guidelines.gov/search"
+    async def _crawl_generic(self, name: str, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """按 SOURCE_SPECS 中的描述爬取 HTML 检索结果页"""
+        crawl_ts = datetime.now().isoformat()  # 同一批次共用抓取时间
+        spec = SOURCE_SPECS[name]
+        selectors = self._selectors[name]
+        link_base = spec['link_base'].format(**self.config.CRAWLER_CONFIG)
+        extra = spec.get('extra', {})
         
         for keyword in keywords:
             try:
-                search_url = f"{base_url}?term={quote(keyword)}"
-                print(f"正在爬取诊疗指南: {search_url}")
+                search_url = spec['url'].format(q=quote(keyword), **self.config.CRAWLER_CONFIG)
+                logger.debug("正在爬取 %s: %s", spec['label'], search_url)
                 
-                async with self.session.get(search_url, headers=self.headers) as response:
+                async with self.fetch(search_url) as response:
                     if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
+                        count = 0
+                        parse_errors = 0
                         
-                        guidelines = soup.find_all('div', class_='guideline-item')
-                        print(f"找到 {len(guidelines)} 条诊疗指南")
-                        
-                        for guideline in guidelines:
+                        async for item in self._iter_items(response, name):
+                            count += 1
                             try:
-                                title = guideline.find('h3', class_='guideline-title')
-                                org = guideline.find('div', class_='organization')
-                                content = guideline.find('div', class_='guideline-content')
+                                title = self._first(selectors['title'], item)
                                 
-                                if title:
-                                    data = {
-                                        'title': title.text.strip(),
-                                        'organization': org.text.strip() if org else "",
-                                        'content': content.text.strip() if content else "",
-                                        'url': title.find('a')['href'] if title.find('a') else "",
-                                        'source': 'Medical Guidelines',
-                                        'type': 'guideline',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat()
-                                    }
-                                    results.append(data)
+                                if title is not None:
+                                    link = title if selectors['link'] is None else self._first(selectors['link'], title)
+                                    href = link.get('href') if link is not None else None
+                                    
+                                    data = {'title': title.text_content().strip()}
+                                    for field, selector in selectors['fields'].items():
+                                        data[field] = self._text(selector, item)
+                                    data['url'] = link_base + href if href else ""
+                                    data['source'] = spec['source']
+                                    data.update(extra)
+                                    data['keyword'] = keyword
+                                    data['crawl_time'] = crawl_ts
+                                    yield data
                                     
-                            except Exception as e:
-                                print(f"处理指南数据时出错: {str(e)}")
+                            except Exception:
+                                parse_errors += 1
                                 continue
                                 
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
+                        logger.debug("%s 找到 %d 条结果", spec['label'], count)
+                        if parse_errors:
+                            logger.warning("%s 关键词 %s: %d 条结果解析失败", spec['label'], keyword, parse_errors)
+                        
             except Exception as e:
-                print(f"爬取诊疗指南关键词 {keyword} 失败: {str(e)}")
+                logger.warning("爬取 %s 关键词 %s 失败: %r", spec['label'], keyword, e)
                 continue
-                
-        return results
         
-    async def crawl_medical_wiki(self, keywords: List[str]) -> List[Dict[str, Any]]:
+    def crawl_pubmed(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """从 PubMed 爬取医学文献"""
+        return self._crawl_generic('pubmed', keywords)
+        
+    def crawl_who(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """从世界卫生组织网站爬取数据"""
+        return self._crawl_generic('who', keywords)
+        
+    def crawl_cdc(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """从疾病控制中心网站爬取数据"""
+        return self._crawl_generic('cdc', keywords)
+        
+    def crawl_medical_books(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """爬取专业医疗健康书籍信息"""
+        return self._crawl_generic('books', keywords)
+        
+    def crawl_medical_guidelines(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """爬取诊疗指南和案例"""
+        return self._crawl_generic('guidelines', keywords)
+        
+    def crawl_medical_wiki(self, keywords: List[str]) -> AsyncIterator[Dict[str, Any]]:
         """爬取医学百科词条"""
-        results = []
-        base_url = "https://medlineplus.gov/encyclopedia.html"
+        return self._crawl_generic('wiki', keywords)
         
-        for keyword in keywords:
-            try:
-                search_url = f"{base_url}?search={quote(keyword)}"
-                print(f"正在爬取医学百科: {search_url}")
-                
-                async with self.session.get(search_url, headers=self.headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        articles = soup.find_all('div', class_='encyclopedia-item')
-                        print(f"找到 {len(articles)} 条百科词条")
-                        
-                        for article in articles:
-                            try:
-                                title = article.find('h2', class_='title')
-                                content = article.find('div', class_='content')
-                                
-                                if title:
-                                    data = {
-                                        'title': title.text.strip(),
-                                        'content': content.text.strip() if content else "",
-                                        'url': title.find('a')['href'] if title.find('a') else "",
-                                        'source': 'Medical Encyclopedia',
-                                        'type': 'wiki',
-                                        'keyword': keyword,
-                                        'crawl_time': datetime.now().isoformat()
-                                    }
-                                    results.append(data)
-                                    
-                            except Exception as e:
-                                print(f"处理百科数据时出错: {str(e)}")
-                                continue
-                                
-                await asyncio.sleep(self.config.CRAWLER_CONFIG["delay"])
-                
-            except Exception as e:
-                print(f"爬取医学百科关键词 {keyword} 失败: {str(e)}")
-                continue
+    def _crawl_func(self, source: str):
+        """数据源名称到爬取方法的映射"""
+        if source == 'nih':
+            return self.crawl_nih
+        return partial(self._crawl_generic, source)
+        
+    @classmethod
+    def invalidate_fetch_cache(cls, source: Optional[str] = None, keyword: Optional[str] = None):
+        """清除抓取缓存：指定 source 与 keyword 时清除单条，只指定 source 时清除该数据源，都不指定时全部清除"""
+        if source is None:
+            cls._fetch_cache.clear()
+        elif keyword is not None:
+            cls._fetch_cache.pop((source, keyword), None)
+        else:
+            for key in [key for key in cls._fetch_cache if key[0] == source]:
+                del cls._fetch_cache[key]
                 
-        return results
+    async def _fetch_one(self, source: str, keyword: str):
+        """爬取单个 (数据源, 关键词)；结果在 TTL 内复用，并发的相同请求只发起一次"""
+        key = (source, keyword)
+        hit = self._fetch_cache.get(key)
+        if hit is not None:
+            if hit[0] > time.monotonic():
+                self._fetch_cache.move_to_end(key)
+                return hit[1]
+            del self._fetch_cache[key]
+            
+        task = self._fetch_inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch_records(source, keyword))
+            self._fetch_inflight[key] = task
+            task.add_done_callback(lambda _: self._fetch_inflight.pop(key, None))
+        # shield：某个等待方被取消时不影响其他共用该任务的请求
+        return await asyncio.shield(task)
         
-    def save_results(self, results: List[Dict[str, Any]], filename: str):
-        """保存爬取结果"""
+    async def _fetch_records(self, source: str, keyword: str):
+        """实际抓取并写入缓存"""
+        # 单个关键词的结果量很小，物化后才能缓存复用
+        records = tuple([record async for record in self._crawl_func(source)([keyword])])
+        # 空结果多半是请求失败，不缓存，下次重新抓取
+        if records:
+            cache = self._fetch_cache
+            cache[(source, keyword)] = (time.monotonic() + self.FETCH_TTL, records)
+            cache.move_to_end((source, keyword))
+            while len(cache) > self.FETCH_CACHE_SIZE:
+                cache.popitem(last=False)
+        return records
+        
+    @staticmethod
+    def _dedupe_by_url(articles, seen: set) -> List[Dict[str, Any]]:
+        """按 URL 去重并保持顺序，跳过 seen 中已出现的 URL；无 URL 的记录全部保留"""
+        # 同一 URL 保留最先出现的记录（dict 推导式会被后出现的记录覆盖）
+        first = {}
+        for a in articles:
+            if a['url'] not in seen:
+                first.setdefault(a['url'] or id(a), a)
+        unique = list(first.values())
+        seen.update(a['url'] for a in unique if a['url'])
+        return unique
+        
+    async def _crawl_source(self, source: str, keywords: List[str]):
+        """并发爬取某一数据源的所有关键词，完成一个即交给写入协程（不在内存中累积）"""
+        seen = set()
+        for future in asyncio.as_completed([self._fetch_one(source, keyword) for keyword in keywords]):
+            for record in self._dedupe_by_url(await future, seen):
+                self._emit(source, record)
+        
+    async def save_results(self, results: List[Dict[str, Any]], filename: str):
+        """保存爬取结果，文件名已存在时追加随机后缀，不覆盖已有文件"""
         save_path = self.config.STORAGE_PATHS["raw_data"] / filename
         save_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(save_path, 'w', encoding='utf-8') as f:
-            for item in results:
-                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        # 先拼接成完整缓冲区，一次写入
+        buf = b''.join(orjson.dumps(item) + b'\n' for item in results)
+        try:
+            async with aiofiles.open(save_path, 'xb') as f:
+                await f.write(buf)
+        except FileExistsError:
+            save_path = save_path.with_name(f"{save_path.stem}_{uuid.uuid4().hex[:8]}{save_path.suffix}")
+            async with aiofiles.open(save_path, 'xb') as f:
+                await f.write(buf)
+        return save_path
                 
     async def run_crawler(self, keywords: List[str]):
         """运行爬虫"""
+        sources = ['nih', *SOURCE_SPECS]
         try:
             await self.initialize()
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
             # 并行爬取所有数据源
-            tasks = [
-                self.crawl_nih(keywords),
-                self.crawl_pubmed(keywords),
-                self.crawl_who(keywords),
-                self.crawl_cdc(keywords),
-                self.crawl_medical_books(keywords),
-                self.crawl_medical_guidelines(keywords),
-                self.crawl_medical_wiki(keywords)
-            ]
-            
-            results = await asyncio.gather(*tasks)
-            
-            # 保存结果
-            sources = ['nih', 'pubmed', 'who', 'cdc', 'books', 'guidelines', 'wiki']
-            for source, data in zip(sources, results):
-                if data:
-                    self.save_results(data, f'{source}_{timestamp}.jsonl')
-            
-            # 打印统计信息
-            print("\n爬取统计:")
-            for source, data in zip(sources, results):
-                print(f"{source.upper()}: 获取 {len(data)} 条记录")
+            await asyncio.gather(*(self._crawl_source(source, keywords) for source in sources))
             
         finally:
-            await self.close() 
\ No newline at end of file
+            await self.close()
+            
+        # 统计信息（由写入协程计数）
+        for source in sources:
+            logger.info("%s: 获取 %d 条记录", source.upper(), self._counts[source]) 
\ No newline at end of file
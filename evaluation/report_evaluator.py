@@ -1,28 +1,113 @@
 from typing import Dict, Any, List
+from collections import Counter
 import re
-import json
+import numpy as np
+import orjson
+import ahocorasick
+from numba import njit, prange
 from pathlib import Path
 
+# 专业性/规范性/逻辑性的默认匹配模式，可在 evaluation_criteria.json 的 "patterns" 中覆盖
+DEFAULT_PATTERNS = {
+    "专业性": [r"诊断", r"病史", r"体格检查", r"辅助检查", r"鉴别", r"并发症", r"禁忌", r"预后"],
+    "规范性": [r"\d+(?:\.\d+)?\s*(?:mmHg|mmol/L|mg/dL|mg|mL|ml|kg|cm|℃|次/分)"],
+    "逻辑性": [r"因此", r"所以", r"综上", r"由于", r"鉴于", r"考虑", r"建议"]
+}
+
+# 各指标每次命中的得分，封顶 100；未列出的自定义指标按 1 分计
+PATTERN_WEIGHTS = {"专业性": 10, "规范性": 20, "逻辑性": 20}
+
+def _build_ac(sections: List[str]) -> "ahocorasick.Automaton":
+    """将必需章节构建为 Aho-Corasick 自动机，一次扫描匹配全部章节"""
+    automaton = ahocorasick.Automaton()
+    for section in sections:
+        automaton.add_word(section, section)
+    automaton.make_automaton()
+    return automaton
+
+@njit(parallel=True, cache=True)
+def _score_batch(counts, weights):
+    """counts[N, F] 为各报告的模式命中次数，weights[A, F] 为各指标对每个模式的单次得分，返回 [N, A] 分数"""
+    n = counts.shape[0]
+    a = weights.shape[0]
+    out = np.empty((n, a))
+    for i in prange(n):
+        for j in range(a):
+            out[i, j] = min(100.0, (counts[i] * weights[j]).sum())
+    return out
+
 class ReportEvaluator:
     def __init__(self, config):
         self.config = config
         self.criteria = self._load_evaluation_criteria()
+        self._automata = {
+            report_type: _build_ac(criteria["required_sections"])
+            for report_type, criteria in self.criteria.items()
+            if isinstance(criteria, dict) and criteria.get("required_sections")
+        }
+        self._compile_patterns()
+        
+    def _compile_patterns(self):
+        """将各指标的模式合并为一个正则，每个模式一个命名分组，一次扫描统计全部命中"""
+        patterns = {**DEFAULT_PATTERNS, **self.criteria.get("patterns", {})}
+        self._groups = {aspect: [] for aspect in patterns}
+        parts = []
+        for aspect, aspect_patterns in patterns.items():
+            for pattern in aspect_patterns:
+                name = f"p{len(parts)}"
+                self._groups[aspect].append(name)
+                parts.append(f"(?P<{name}>{pattern})")
+        self._combined = re.compile("|".join(parts))
+        
+        # 批量评估用的权重矩阵：行对应指标，列对应模式分组
+        self._aspects = list(self._groups)
+        self._group_index = {f"p{i}": i for i in range(len(parts))}
+        self._weights = np.zeros((len(self._aspects), len(parts)))
+        for a, aspect in enumerate(self._aspects):
+            for name in self._groups[aspect]:
+                self._weights[a, self._group_index[name]] = PATTERN_WEIGHTS.get(aspect, 1.0)
+        
+    def _count_patterns(self, report: str) -> Counter:
+        """单次扫描报告，按分组名统计命中次数"""
+        counts = Counter()
+        for m in self._combined.finditer(report):
+            counts[m.lastgroup] += 1
+        return counts
+        
+    def _pattern_score(self, counts: Counter, aspect: str) -> float:
+        hits = sum(counts[name] for name in self._groups[aspect])
+        return min(100.0, hits * PATTERN_WEIGHTS.get(aspect, 1.0))
         
     def _load_evaluation_criteria(self) -> Dict[str, Any]:
         """加载评估标准"""
         criteria_path = self.config.STORAGE_PATHS["templates"] / "evaluation_criteria.json"
-        with open(criteria_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return orjson.loads(criteria_path.read_bytes())
             
     def evaluate_report(self, report: str, report_type: str) -> Dict[str, Any]:
         """评估报告质量"""
-        scores = {
-            "完整性": self._evaluate_completeness(report, report_type),
-            "专业性": self._evaluate_professionalism(report),
-            "规范性": self._evaluate_standardization(report),
-            "逻辑性": self._evaluate_logic(report)
-        }
+        counts = self._count_patterns(report)
+        # 与批量评估使用同一组指标（含评估标准中自定义的指标）
+        scores = {"完整性": self._evaluate_completeness(report, report_type)}
+        scores.update((aspect, self._pattern_score(counts, aspect)) for aspect in self._aspects)
+        
+        return self._build_result(scores)
+        
+    def evaluate_reports(self, reports: List[str], report_type: str) -> List[Dict[str, Any]]:
+        """批量评估报告：正则计数后由并行编译的内核统一打分"""
+        counts = np.zeros((len(reports), len(self._group_index)))
+        for i, report in enumerate(reports):
+            for m in self._combined.finditer(report):
+                counts[i, self._group_index[m.lastgroup]] += 1
+        pattern_scores = _score_batch(counts, self._weights)
+        
+        results = []
+        for report, row in zip(reports, pattern_scores.tolist()):
+            scores = {"完整性": self._evaluate_completeness(report, report_type)}
+            scores.update(zip(self._aspects, row))
+            results.append(self._build_result(scores))
+        return results
         
+    def _build_result(self, scores: Dict[str, float]) -> Dict[str, Any]:
         total_score = sum(scores.values()) / len(scores)
         
         return {
@@ -34,28 +119,27 @@ class ReportEvaluator:
     def _evaluate_completeness(self, report: str, report_type: str) -> float:
         """评估完整性"""
         required_sections = self.criteria[report_type]["required_sections"]
-        present_sections = sum(1 for section in required_sections if section in report)
-        return present_sections / len(required_sections) * 100
+        present_sections = {section for _, section in self._automata[report_type].iter(report)}
+        return len(present_sections) / len(required_sections) * 100
         
-    def _evaluate_professionalism(self, report: str) -> float:
+    def _evaluate_professionalism(self, counts: Counter) -> float:
         """评估专业性"""
-        # 实现专业性评估逻辑
-        return score
+        return self._pattern_score(counts, "专业性")
         
-    def _evaluate_standardization(self, report: str) -> float:
+    def _evaluate_standardization(self, counts: Counter) -> float:
         """评估规范性"""
-        # 实现规范性评估逻辑
-        return score
+        return self._pattern_score(counts, "规范性")
         
-    def _evaluate_logic(self, report: str) -> float:
+    def _evaluate_logic(self, counts: Counter) -> float:
         """评估逻辑性"""
-        # 实现逻辑性评估逻辑
-        return score
+        return self._pattern_score(counts, "逻辑性")
         
     def _generate_suggestions(self, scores: Dict[str, float]) -> List[str]:
         """生成改进建议"""
         suggestions = []
+        aspect_suggestions = self.criteria.get("suggestions", {})
         for aspect, score in scores.items():
             if score < 80:
-                suggestions.append(self.criteria["suggestions"][aspect])
+                # 自定义指标可能没有配置建议
+                suggestions.append(aspect_suggestions.get(aspect, f"请改进报告的{aspect}"))
         return suggestions 
\ No newline at end of file
@@ -5,98 +5,28 @@ import gc
 from workflows.workflow_manager import WorkflowManager
 from knowledge_base.knowledge_manager import KnowledgeManager
 from config.config import Config
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
-import bitsandbytes as bnb
 import socket
-
-class BaseAgent:
-    def __init__(self, model_path: str):
-        self.model_path = model_path
-        self.model = None
-        self.tokenizer = None
-        
-    def load_model(self):
-        try:
-            # 清理现有内存
-            clean_gpu_memory()
-            
-            # 配置 8-bit 量化
-            quantization_config = BitsAndBytesConfig(
-                load_in_8bit=True,
-                llm_int8_threshold=6.0,
-                llm_int8_has_fp16_weight=False
-            )
-            
-            # 设置模型加载参数
-            load_config = {
-                "device_map": "auto",          # 自动设备映射
-                "max_memory": {0: "15GB"},     # 限制GPU内存使用
-                "offload_folder": "/root/autodl-tmp/offload",  # 模型权重卸���目录
-                "quantization_config": quantization_config,    # 8-bit 量化
-                "load_in_8bit": True,          # 启用 8-bit 量化
-                "trust_remote_code": True,
-                "use_auth_token": False,
-                "torch_dtype": torch.float16,   # 使用半精度
-                "low_cpu_mem_usage": True      # 低内存加载
-            }
-            
-            # 加载分词器
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_path,
-                trust_remote_code=True,
-                use_fast=True  # 使用快速分词器
-            )
-            
-            # 加载模型
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_path,
-                **load_config
-            )
-            
-            # 使用 bitsandbytes 进行额外优化
-            for param in self.model.parameters():
-                param.data = param.data.to(torch.int8)
-            
-            # 设置生成参数
-            self.model.config.use_cache = True  # 启用 KV 缓存
-            self.model.generation_config.max_new_tokens = 256  # 减小生成长度
-            self.model.generation_config.temperature = 0.7
-            self.model.generation_config.top_p = 0.9
-            self.model.generation_config.do_sample = True
-            
-            # 确保有 pad_token
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
-                
-            # 启用梯度检查点
-            self.model.gradient_checkpointing_enable()
-            
-            # 清理缓存
-            clean_gpu_memory()
-                
-        except Exception as e:
-            print(f"模型加载失败: {str(e)}")
-            raise e
+from functools import lru_cache
 
 class MedicalReportGenerator:
-    _instance = None
-    _lock = asyncio.Lock()
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(MedicalReportGenerator, cls).__new__(cls)
-            cls._instance.knowledge_mgr = None
-            cls._instance.workflow_mgr = None
-            cls._instance._is_initialized = False
-        return cls._instance
+    def __init__(self):
+        self.knowledge_mgr = None
+        self.workflow_mgr = None
+        self._is_initialized = False
+        # 锁在首次初始化时于运行中的事件循环里创建，导入时还没有事件循环
+        self._lock = None
     
     async def initialize(self):
+        # 初始化完成后直接返回，不再争用锁
+        if self._is_initialized:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
         async with self._lock:  # 使用锁来确保并发安全
             if not self._is_initialized:
                 try:
                     if torch.cuda.is_available():
                         clean_gpu_memory()
-                        torch.cuda.set_per_process_memory_fraction(0.6)
                     
                     # 初始化知识库管理器
                     self.knowledge_mgr = KnowledgeManager(config=Config)
@@ -141,14 +71,10 @@ class MedicalReportGenerator:
             print(f"生成报告时出错: {str(e)}")
             return f"生成报告失败: {str(e)}"
 
-# 创建全局单例实例
-_generator = None
-
+@lru_cache(maxsize=1)
 def get_generator():
-    global _generator
-    if _generator is None:
-        _generator = MedicalReportGenerator()
-    return _generator
+    """返回全局唯一的报告生成器"""
+    return MedicalReportGenerator()
 
 def create_gradio_interface():
     # 使用全局单例实例
@@ -195,15 +121,17 @@ def create_gradio_interface():
             inputs=[patient_info, report_type]
         )
         
-        # 绑定生成函数并设置队列
+        # 直接绑定异步函数，由 Gradio 在自身事件循环中调度
         submit_btn.click(
-            fn=lambda x, y: asyncio.run(generator.generate_report(x, y)),
+            fn=generator.generate_report,
             inputs=[patient_info, report_type],
             outputs=output,
             api_name="generate",
             queue=True
         )
     
+    # 允许多个请求并发执行，知识库检索可与模型解码交错进行
+    demo.queue(default_concurrency_limit=4)
     return demo
 
 def clean_gpu_memory():
@@ -222,8 +150,7 @@ if __name__ == "__main__":
     # 设置 CUDA 环境变量
     import os
     import socket
-    os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'expandable_segments:True,max_split_size_mb:256'
-    os.environ['CUDA_LAUNCH_BLOCKING'] = '1'
+    os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'expandable_segments:True,max_split_size_mb:256,garbage_collection_threshold:0.8'
     os.environ['CUDA_VISIBLE_DEVICES'] = '0,1'
     
     # 设置 bitsandbytes 参数
@@ -1,32 +1,47 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 import re
-from bs4 import BeautifulSoup
+import ahocorasick
+from lxml import html as lxml_html
+
+# 默认医学术语表，构造 DataProcessor 时可追加外部词表
+DEFAULT_MEDICAL_TERMS = [
+    "高血压", "糖尿病", "冠心病", "心血管疾病", "脑卒中", "高血脂",
+    "头痛", "头晕", "眩晕", "心悸", "胸闷", "呼吸急促", "乏力",
+    "咳嗽", "发热", "腹痛", "恶心", "呕吐", "腹泻",
+    "关节痛", "肌肉酸痛", "失眠", "食欲不振",
+    "钙通道阻滞剂", "血管紧张素转换酶抑制剂", "血管紧张素受体拮抗剂"
+]
 
 class DataProcessor:
+    def __init__(self, terms: Iterable[str] = ()):
+        # 术语表只构建一次 Aho-Corasick 自动机，提取时对文本单次线性扫描
+        self._automaton = ahocorasick.Automaton()
+        for term in {*DEFAULT_MEDICAL_TERMS, *terms}:
+            self._automaton.add_word(term, term)
+        self._automaton.make_automaton()
+        
     @staticmethod
     def clean_html(html_content: str) -> str:
-        """清理HTML内容"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        return soup.get_text()
+        """清理HTML内容，只提取文本"""
+        if not html_content or not html_content.strip():
+            return ""
+        # lxml 的 C 解析器比 html.parser 快得多
+        return str(lxml_html.fromstring(html_content).text_content())
         
-    @staticmethod
-    def extract_medical_terms(text: str) -> List[str]:
-        """提取医学术语"""
-        # 这里需要根据具体需求实现医学术语提取逻辑
-        return []
+    def extract_medical_terms(self, text: str) -> List[str]:
+        """提取医学术语，按出现顺序去重"""
+        return list(dict.fromkeys(term for _, term in self._automaton.iter(text)))
         
     @staticmethod
     def chunk_document(text: str, chunk_size: int, overlap: int) -> List[str]:
-        """文档分块"""
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = start + chunk_size
-            if end > len(text):
-                end = len(text)
-            chunks.append(text[start:end])
-            start = end - overlap
-        return chunks
+        """文档分块，相邻块重叠 overlap 个字符"""
+        step = chunk_size - overlap
+        if step <= 0:
+            raise ValueError("overlap 必须小于 chunk_size")
+        if not text:
+            return []
+        # 一次算出所有起点，最后一块到达文本末尾即停止
+        return [text[start:start + chunk_size] for start in range(0, max(len(text) - overlap, 1), step)]
         
     @staticmethod
     def format_medical_report(report_data: Dict[str, Any]) -> str:
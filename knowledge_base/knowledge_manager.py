@@ -1,19 +1,129 @@
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Optional
+import orjson
+import hashlib
 from pathlib import Path
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import logging
+import asyncio
+import threading
+import os
+from functools import lru_cache
+from collections import OrderedDict
+from bisect import bisect_right
 
 logger = logging.getLogger(__name__)
 
+# 血压分级阈值（mmHg），达到第 i 个阈值即为 i+1 级高血压
+_SYSTOLIC_THRESHOLDS = (140, 160, 180)
+_DIASTOLIC_THRESHOLDS = (90, 100, 110)
+_BP_LEVELS = ("正常", "1级高血压", "2级高血压", "3级高血压")
+
+class _QueryCache:
+    """检索结果缓存：相同查询走 LRU 精确命中；设置了 threshold 时，近似查询按向量余弦相似度命中"""
+    EXACT_SIZE = 1024
+    MAX_SIZE = 4096
+    BLOCK = 256  # 向量矩阵按块扩容
+    
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = threshold
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.clear()
+        
+    def clear(self):
+        """索引重建后清空，并让清空前发起的检索结果不再写入"""
+        with self._lock:
+            self._exact = OrderedDict()
+            self._embs = None
+            self._entries = []  # 与 _embs 各行对应的 (k, results)
+            self._next = 0  # 缓存满后下一个被覆盖的行
+            self.generation += 1
+            
+    def get(self, query: str, k: int):
+        with self._lock:
+            results = self._exact.get((query, k))
+            if results is None:
+                return None
+            self._exact.move_to_end((query, k))
+            return list(results)
+            
+    def get_similar(self, query_vec: np.ndarray, k: int):
+        """已缓存查询中与 query_vec 最相近的一条，余弦相似度达到阈值时返回其结果"""
+        if self.threshold is None:
+            return None
+        with self._lock:
+            n = len(self._entries)
+            if n == 0:
+                return None
+            sims = self._embs[:n] @ query_vec
+            best = int(np.argmax(sims))
+            cached_k, results = self._entries[best]
+            if sims[best] >= self.threshold and cached_k == k:
+                return list(results)
+            return None
+            
+    def put(self, query: str, k: int, query_vec: np.ndarray, results: List[Dict[str, Any]], generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._exact[(query, k)] = results
+            if len(self._exact) > self.EXACT_SIZE:
+                self._exact.popitem(last=False)
+            if self.threshold is None:
+                return
+                
+            n = len(self._entries)
+            if n < self.MAX_SIZE:
+                if self._embs is None or n == len(self._embs):
+                    grown = np.empty((n + self.BLOCK, len(query_vec)), dtype='float32')
+                    if n:
+                        grown[:n] = self._embs
+                    self._embs = grown
+                row = n
+                self._entries.append((k, results))
+            else:
+                # 缓存已满，覆盖最早写入的一行
+                row = self._next
+                self._entries[row] = (k, results)
+                self._next = (row + 1) % self.MAX_SIZE
+            self._embs[row] = query_vec
+
 class KnowledgeManager:
+    # 未配置 index_type 时，文档数低于该值使用精确的暴力内积检索
+    FLAT_INDEX_MAX_SIZE = 10000
+    # 读取 JSONL 时使用 1 MiB 缓冲，减少大文件的系统调用次数
+    READ_BUFFER_SIZE = 1 << 20
+    # 多 GPU 时，向量数达到该值才分片到所有 GPU，否则只用一张卡
+    GPU_SHARD_MIN_SIZE = 1000000
+    # 合并该时间窗口（秒）内到达的并发查询
+    SEARCH_BATCH_WINDOW = 0.005
+    
     def __init__(self, config):
         self.config = config
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-        self.index = None
+        if torch.cuda.is_available():
+            self.encoder = self._load_gpu_encoder()
+        else:
+            self._configure_cpu_threads()
+            self.encoder = self._load_cpu_encoder()
+        # 常见症状查询会反复出现，缓存查询向量
+        self._encode_query = lru_cache(maxsize=1024)(self._encode_query_uncached)
+        self.index = None  # 检索用的索引，GPU 可用时为 GPU 副本
+        self._cpu_index = None  # CPU 上的主索引，用于持久化和追加
+        self._docs_arr = np.empty(0, dtype=object)
+        self._gpu_res = None
+        # 导入数据时原位追加索引，追加与检索不能并发；GPU 资源也不能被多个线程同时使用
+        self._index_guard = threading.Lock()
+        self._index_fingerprint = None  # 当前索引对应的缓存指纹，追加后按同一指纹重新持久化
+        self._local = threading.local()  # 各线程复用的 (1, dim) 查询缓冲区
+        self._pending = []  # 等待合并检索的 (query, k, future)
+        self._flush_task = None
+        self._query_cache = _QueryCache(config.KNOWLEDGE_BASE_CONFIG.get("query_cache_similarity"))
         self.documents = []
+        self._seen_keys = set()  # 已收录文档的去重键（URL 或标题+正文摘要），用于入库去重
+        self._initialized = False
         self.medical_rules = {
             "高血压": {
                 "levels": {
@@ -48,13 +158,75 @@ class KnowledgeManager:
                 }
             }
         }
+        # 症状归类时按集合做 O(1) 成员判断
+        hypertension_symptoms = self.medical_rules["高血压"]["symptoms"]
+        self._primary_set = frozenset(hypertension_symptoms["primary"])
+        self._secondary_set = frozenset(hypertension_symptoms["secondary"])
+        
+    @staticmethod
+    def _configure_cpu_threads():
+        """CPU 编码时让算子内并行用满所有核，算子间不再并行"""
+        torch.set_num_threads(os.cpu_count() or 1)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # 进程内已经执行过并行算子时不能再修改
+            pass
+            
+    def _load_gpu_encoder(self):
+        """已导出 ONNX 模型时用 ONNX Runtime 的 CUDA 后端推理，否则使用半精度 SentenceTransformer"""
+        encoder = self._load_onnx_encoder(quantized=False, provider="CUDAExecutionProvider")
+        if encoder is not None:
+            return encoder
+        encoder = SentenceTransformer('all-MiniLM-L6-v2', device='cuda')
+        encoder.half()  # GPU 上用半精度推理
+        return encoder
+        
+    def _load_cpu_encoder(self):
+        """CPU 上优先使用 ONNX Runtime int8 量化编码器，不可用时退回 SentenceTransformer"""
+        encoder = self._load_onnx_encoder(quantized=True, provider="CPUExecutionProvider")
+        if encoder is not None:
+            return encoder
+        return SentenceTransformer('all-MiniLM-L6-v2')
+        
+    def _load_onnx_encoder(self, quantized: bool, provider: str):
+        """加载已导出的 ONNX 编码器；未安装 optimum、尚未导出（scripts/export_encoder.py）或加载失败时返回 None"""
+        try:
+            from .onnx_encoder import OnnxEncoder, ONNX_FILE, QUANTIZED_FILE
+        except ImportError:
+            logger.info("未安装 optimum[onnxruntime]，使用 SentenceTransformer 编码")
+            return None
+        onnx_dir = self.config.STORAGE_PATHS["onnx_encoder"]
+        file_name = QUANTIZED_FILE if quantized else ONNX_FILE
+        # 启动时不做导出与量化（需要联网，且量化依赖 CPU 指令集），只使用已导出完成的模型
+        if not (onnx_dir / file_name).exists():
+            logger.info(f"未找到已导出的 ONNX 编码器 {onnx_dir / file_name}，使用 SentenceTransformer 编码")
+            return None
+        try:
+            return OnnxEncoder(onnx_dir, file_name, provider=provider)
+        except Exception as e:
+            logger.warning(f"加载 ONNX 编码器失败，使用 SentenceTransformer 编码: {str(e)}")
+            return None
         
     async def initialize(self):
-        """初始化知识库"""
+        """初始化知识库，重复调用时直接返回"""
+        if self._initialized:
+            return
+        # 上次初始化失败时可能留下部分文档，从头开始
+        self.documents = []
+        self._seen_keys.clear()
         try:
             # 1. 加载默认文档
             self._initialize_default_documents()
-            logger.info(f"加载了 {len(self.documents)} 个默认文档")
+            num_default = len(self.documents)
+            logger.info(f"加载了 {num_default} 个默认文档")
+            
+            # 文档未变化时直接加载上次持久化的索引，跳过编码
+            fingerprint = self._index_fingerprint = self._fingerprint()
+            if self._load_index_cache(fingerprint):
+                logger.info(f"从缓存加载索引，包含 {len(self.documents)} 个文档")
+                self._initialized = True
+                return
             
             # 2. 尝试加载额外文档
             self._load_documents()
@@ -64,35 +236,231 @@ class KnowledgeManager:
             if not texts:
                 logger.warning("没有找到任何文档，创建空索引")
                 # 创建空索引
-                self.index = faiss.IndexFlatL2(384)  # 使用默认维度
+                self.index = self._new_index(384)  # 使用默认维度
             else:
                 logger.info(f"开始为 {len(texts)} 个文档构建索引")
-                embeddings = self.encoder.encode(texts)
+                embeddings = self._encode_with_default_cache(texts, num_default)
                 vector_dim = embeddings.shape[1]
                 
-                self.index = faiss.IndexFlatL2(vector_dim)
-                embeddings_array = np.array(embeddings).astype('float32')
-                self.index.add(embeddings_array)
+                self._index_embeddings(embeddings)
                 
                 logger.info(f"索引构建完成，维度: {vector_dim}")
+                self._save_index_cache(fingerprint)
+            self._initialized = True
             
         except Exception as e:
             logger.error(f"初始化知识库失败: {str(e)}")
             # 确保即使出错也创建一个空索引
-            self.index = faiss.IndexFlatL2(384)
+            self.index = self._new_index(384)
             raise
         
+    def _index_cache_paths(self):
+        """返回 (索引文件, 文档文件, 指纹文件) 路径"""
+        cache_dir = self.config.STORAGE_PATHS["embeddings"]
+        return (
+            cache_dir / "knowledge.index",
+            cache_dir / "knowledge_docs.jsonl",
+            cache_dir / "knowledge.fingerprint"
+        )
+        
+    def _fingerprint(self) -> str:
+        """生成索引缓存指纹，任一输入变化都需要重建索引
+        
+        包括默认文档内容、疾病文档文件的 mtime/size、索引配置，以及编码器类型和设备
+        （int8/fp16/fp32 编码器的向量不能混用）
+        """
+        digest = hashlib.sha1(orjson.dumps(self.documents, option=orjson.OPT_SORT_KEYS))
+        diseases_path = self.config.STORAGE_PATHS["diseases"]
+        if diseases_path.exists():
+            stat = diseases_path.stat()
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+        kb_config = self.config.KNOWLEDGE_BASE_CONFIG
+        digest.update(orjson.dumps([kb_config.get("index_type"), kb_config.get("nprobe"), self._encoder_id()]))
+        return digest.hexdigest()
+        
+    def _encoder_id(self) -> str:
+        """编码器类型与设备，不同精度的编码器生成的向量不能混用"""
+        return f"{type(self.encoder).__name__}:{getattr(self.encoder, 'device', '')}"
+        
+    def _encode_with_default_cache(self, texts: List[str], num_default: int) -> np.ndarray:
+        """默认文档的向量按内容校验和缓存在磁盘上，只编码其余文档"""
+        default_texts = texts[:num_default]
+        checksum = hashlib.sha1(orjson.dumps([default_texts, self._encoder_id()])).hexdigest()[:16]
+        cache_path = self.config.STORAGE_PATHS["embeddings"] / f"default_docs_{checksum}.npy"
+        try:
+            default_embeddings = np.load(cache_path)
+        except (OSError, ValueError):
+            default_embeddings = self._encode_documents(default_texts)
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(cache_path, default_embeddings)
+            except OSError as e:
+                logger.warning(f"保存默认文档向量失败: {str(e)}")
+        if num_default == len(texts):
+            return default_embeddings
+        return np.concatenate([default_embeddings, self._encode_documents(texts[num_default:])])
+        
+    def _load_index_cache(self, fingerprint: str) -> bool:
+        """指纹一致时加载持久化的索引和文档，返回是否命中"""
+        index_path, docs_path, fingerprint_path = self._index_cache_paths()
+        if not (index_path.exists() and docs_path.exists() and fingerprint_path.exists()):
+            return False
+        if fingerprint_path.read_text(encoding='utf-8') != fingerprint:
+            return False
+        try:
+            # 导入数据时会原位追加，且内存映射的倒排表不能复制到 GPU，整体读入内存
+            index = faiss.read_index(str(index_path))
+            with open(docs_path, 'rb', buffering=self.READ_BUFFER_SIZE) as f:
+                documents = [orjson.loads(line) for line in f]
+        except Exception as e:
+            logger.warning(f"读取索引缓存失败，重新构建: {str(e)}")
+            return False
+        if index.ntotal != len(documents):
+            return False
+        self.documents = documents
+        self._seen_keys = {key for key in map(self._dedupe_key, documents) if key is not None}
+        self._set_index(index)
+        return True
+        
+    def _save_index_cache(self, fingerprint: str):
+        """持久化索引与文档，指纹最后写入，中途失败不会留下可命中的缓存"""
+        index_path, docs_path, fingerprint_path = self._index_cache_paths()
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            fingerprint_path.unlink(missing_ok=True)
+            faiss.write_index(self._cpu_index, str(index_path))
+            with open(docs_path, 'wb') as f:
+                f.writelines(orjson.dumps(doc, option=orjson.OPT_APPEND_NEWLINE) for doc in self.documents)
+            fingerprint_path.write_text(fingerprint, encoding='utf-8')
+        except Exception as e:
+            logger.warning(f"保存索引缓存失败: {str(e)}")
+        
     def _load_documents(self):
         """加载文档数据"""
         diseases_path = self.config.STORAGE_PATHS["diseases"]
         if diseases_path.exists():
             logger.info(f"从 {diseases_path} 加载文档")
-            with open(diseases_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    self.documents.append(json.loads(line))
+            # orjson 直接解析字节，省去逐行 UTF-8 解码
+            with open(diseases_path, 'rb', buffering=self.READ_BUFFER_SIZE) as f:
+                self.documents.extend(self._dedupe(orjson.loads(line) for line in f))
         else:
             logger.warning(f"文档路径不存在: {diseases_path}")
+            
+    @staticmethod
+    def _dedupe_key(doc: Dict[str, Any]):
+        """文档的去重键：有 URL 时用 URL，否则用标题与正文的 SHA-1；两者都没有时返回 None，不参与去重"""
+        url = doc.get("url")
+        if url:
+            return url
+        content = doc.get("content")
+        if not content:
+            return None
+        return hashlib.sha1(orjson.dumps([doc.get("title", ""), content])).digest()
+        
+    def _dedupe(self, docs) -> List[Dict[str, Any]]:
+        """返回此前未收录过的文档并记录其去重键"""
+        seen = self._seen_keys
+        unique = []
+        for doc in docs:
+            key = self._dedupe_key(doc)
+            if key is None:
+                unique.append(doc)
+            elif key not in seen:
+                seen.add(key)
+                unique.append(doc)
+        return unique
                     
+    def _encode_documents(self, texts: List[str]) -> np.ndarray:
+        """批量编码文档，返回归一化后的 float32 向量"""
+        embeddings = self.encoder.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # 已是 float32 时 asarray 不复制（GPU 半精度编码时才转换一次）
+        return np.asarray(embeddings, dtype='float32')
+        
+    def _encode_query_uncached(self, query: str) -> np.ndarray:
+        """编码查询并归一化；结果会被缓存共享，设为只读"""
+        vector = np.asarray(self.encoder.encode([query], normalize_embeddings=True)[0], dtype='float32')
+        vector.setflags(write=False)
+        return vector
+        
+    def _new_index(self, vector_dim: int, num_vectors: int = 0):
+        """按 index_type 用 index_factory 创建内积索引，向量归一化后内积即余弦相似度
+        
+        未配置 index_type 时，文档较少用精确的 Flat（一次 GEMM，无需训练），
+        文档多时用 IVF256,SQ8：8 位标量量化减少内存带宽，倒排只扫描 nprobe 个簇
+        """
+        kb_config = self.config.KNOWLEDGE_BASE_CONFIG
+        description = kb_config.get("index_type")
+        if not description or num_vectors == 0:
+            description = "Flat" if num_vectors < self.FLAT_INDEX_MAX_SIZE else "IVF256,SQ8"
+        index = faiss.index_factory(vector_dim, description, faiss.METRIC_INNER_PRODUCT)
+        
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = kb_config.get("nprobe", 16)
+        if hasattr(index, "hnsw"):
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = max(kb_config["top_k"] * 4, 32)
+        return index
+        
+    def _index_embeddings(self, embeddings):
+        """用已归一化的向量重建索引（编码器输出时已归一化，这里不再重复）"""
+        # 已是连续的 float32 时不再复制
+        embeddings_array = np.ascontiguousarray(embeddings, dtype='float32')
+        assert embeddings_array.flags.c_contiguous
+        index = self._new_index(embeddings_array.shape[1], len(embeddings_array))
+        if not index.is_trained:
+            # IVF/PQ 等索引需要先用全部向量训练
+            index.train(embeddings_array)
+        index.add(embeddings_array)
+        self._set_index(index)
+        
+    def _set_index(self, cpu_index):
+        """替换当前索引：保留 CPU 主索引，检索用的索引在 GPU 可用时复制到 GPU"""
+        self._cpu_index = cpu_index
+        self.index = self._to_device(cpu_index)
+        self._refresh_docs_arr()
+        
+    def _refresh_docs_arr(self):
+        """文档变化后重建对象数组并作废检索结果缓存"""
+        # 文档的对象数组与索引行号一一对应，检索结果可以直接用 numpy 花式索引取出
+        docs_arr = np.empty(len(self.documents), dtype=object)
+        docs_arr[:] = self.documents
+        self._docs_arr = docs_arr
+        self._query_cache.clear()
+        
+    def _to_device(self, cpu_index):
+        """GPU 可用时复制到 GPU（向量以 fp16 存放），不支持的索引类型或复制失败时留在 CPU"""
+        num_gpus = faiss.get_num_gpus() if self.config.KNOWLEDGE_BASE_CONFIG.get("faiss_gpu", True) else 0
+        if num_gpus == 0 or cpu_index.ntotal == 0:
+            return cpu_index
+        try:
+            if num_gpus > 1 and cpu_index.ntotal >= self.GPU_SHARD_MIN_SIZE:
+                co = faiss.GpuMultipleClonerOptions()
+                co.shard = True
+                co.useFloat16 = True
+                index = faiss.index_cpu_to_all_gpus(cpu_index, co=co)
+            else:
+                if self._gpu_res is None:
+                    self._gpu_res = faiss.StandardGpuResources()
+                co = faiss.GpuClonerOptions()
+                co.useFloat16 = True
+                index = faiss.index_cpu_to_gpu(self._gpu_res, 0, cpu_index, co)
+        except Exception as e:
+            # 如 HNSW 没有 GPU 实现
+            logger.warning(f"索引复制到 GPU 失败，使用 CPU 索引: {str(e)}")
+            return cpu_index
+        return index
+        
+    def _index_search(self, index, query_array: np.ndarray, k: int):
+        with self._index_guard:
+            return index.search(query_array, k)
+        
     def _build_index(self):
         """构建向量索引"""
         if not self.documents:
@@ -102,18 +470,14 @@ class KnowledgeManager:
         try:
             # 编码文档
             texts = [doc["content"] for doc in self.documents]
-            embeddings = self.encoder.encode(texts)
+            embeddings = self._encode_documents(texts)
             
             # 获向量维度
             vector_dim = embeddings.shape[1]
             logger.info(f"向量维度: {vector_dim}")
             
-            # 构建FAISS索引
-            self.index = faiss.IndexFlatL2(vector_dim)  # 使用实际的向量维度
-            
-            # 添加向量到索引
-            embeddings_array = np.array(embeddings).astype('float32')
-            self.index.add(embeddings_array)
+            # 构建FAISS索引并添加向量
+            self._index_embeddings(embeddings)
             
             logger.info(f"成功构建索引，包含 {len(self.documents)} 个文档")
             
@@ -122,87 +486,170 @@ class KnowledgeManager:
             raise
         
     async def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """搜索相关文档"""
+        """搜索相关文档
+        
+        同一时间窗口内到达的并发查询合并为一次编码和一次 FAISS 检索，在线程池中执行，不阻塞事件循环
+        """
         try:
             if self.index is None:
                 logger.warning("索引未初始化，创建空索引")
-                self.index = faiss.IndexFlatL2(384)
+                self.index = self._new_index(384)
                 return []
             
             if self.index.ntotal == 0:
                 logger.warning("索引为空，无法搜索")
                 return []
             
-            # 编码查询
-            query_vector = self.encoder.encode([query])[0]
+            results = self._query_cache.get(query, k)
+            if results is None:
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._pending.append((query, k, future))
+                if len(self._pending) == 1:
+                    # 本窗口的第一个查询负责安排批量检索
+                    self._flush_task = loop.create_task(self._flush_pending())
+                results = await future
             
-            # 搜索最相关的文档
-            distances, indices = self.index.search(
-                np.array([query_vector]).astype('float32'), 
-                min(k, self.index.ntotal)  # 确保k不超过索引中的文档数
-            )
-            
-            # 返回结果
-            results = []
-            for idx, distance in zip(indices[0], distances[0]):
-                if idx < len(self.documents) and distance < self.config.KNOWLEDGE_BASE_CONFIG["similarity_threshold"]:
-                    results.append(self.documents[idx])
-                    
             logger.info(f"查询 '{query}' 找到 {len(results)} 个相关文档")
             return results
             
         except Exception as e:
             logger.error(f"搜索失败: {str(e)}")
             return []
-
+            
+    async def _flush_pending(self):
+        """等待一个批处理窗口，把期间积累的查询一次检索完，再把结果分发给各个调用方"""
+        await asyncio.sleep(self.SEARCH_BATCH_WINDOW)
+        batch, self._pending = self._pending, []
+        try:
+            results = await asyncio.to_thread(
+                self._search_batch_sync, self.index, [(query, k) for query, k, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():  # 调用方可能已取消
+                future.set_result(result)
+                
+    def _search_batch_sync(self, index, requests: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """批量检索 (query, k)：先查结果缓存，未命中的查询一次编码、一次 FAISS 检索；FAISS 检索期间释放 GIL"""
+        cache = self._query_cache
+        generation = cache.generation
+        results = [cache.get(query, k) for query, k in requests]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        
+        if len(misses) == 1:
+            query_vecs = [self._encode_query(requests[misses[0]][0])]
+        else:
+            query_vecs = self._encode_documents([requests[i][0] for i in misses])
+        
+        # 近似重复的查询直接复用已缓存的结果
+        to_search = []
+        for i, query_vec in zip(misses, query_vecs):
+            results[i] = cache.get_similar(query_vec, requests[i][1])
+            if results[i] is None:
+                to_search.append((i, query_vec))
+        if not to_search:
+            return results
+        
+        if len(to_search) == 1:
+            # 单条查询写入本线程复用的缓冲区，而不是每次新建数组
+            query_array = getattr(self._local, "query_buf", None)
+            if query_array is None or query_array.shape[1] != index.d:
+                query_array = self._local.query_buf = np.empty((1, index.d), dtype='float32')
+            query_array[0] = to_search[0][1]
+        else:
+            query_array = np.stack([query_vec for _, query_vec in to_search])
+        
+        # 按批内最大的 k 检索一次，结果按相似度降序，再按各自的 k 截断
+        k_max = min(max(requests[i][1] for i, _ in to_search), index.ntotal)
+        scores, indices = self._index_search(index, query_array, k_max)
+        for (i, query_vec), row_indices, row_scores in zip(to_search, indices, scores):
+            query, k = requests[i]
+            hits = self._collect_hits(row_indices[:k], row_scores[:k])
+            cache.put(query, k, query_vec, hits, generation)
+            results[i] = list(hits)
+        return results
+        
+    async def search_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """批量检索：所有查询一次编码、一次 FAISS 搜索，按输入顺序返回结果"""
+        if not queries:
+            return []
+        if self.index is None or self.index.ntotal == 0:
+            logger.warning("索引为空，无法搜索")
+            return [[] for _ in queries]
+        try:
+            return await asyncio.to_thread(self._search_batch_sync, self.index, [(query, k) for query in queries])
+        except Exception as e:
+            logger.error(f"批量搜索失败: {str(e)}")
+            return [[] for _ in queries]
+            
+    def _collect_hits(self, indices, scores) -> List[Dict[str, Any]]:
+        """按相似度阈值过滤一个查询的检索结果（内积即余弦相似度，越大越相关）"""
+        threshold = self.config.KNOWLEDGE_BASE_CONFIG["similarity_threshold"]
+        docs = self._docs_arr
+        mask = (indices >= 0) & (indices < len(docs)) & (scores >= threshold)
+        return docs[indices[mask]].tolist()
+        
     async def import_crawled_data(self):
         """导入爬取的数据到知识库"""
         raw_data_path = self.config.STORAGE_PATHS["raw_data"]
         
-        for file_path in raw_data_path.glob("*.jsonl"):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        data = json.loads(line)
-                        # 处理并存储数据
-                        processed_data = self._process_medical_data(data)
-                        if processed_data:
-                            self.documents.append(processed_data)
-                            
-                # 更新向量索引
-                self._update_index()
-                
-            except Exception as e:
-                logger.error(f"导入数据失败 {file_path}: {str(e)}")
+        # 各文件在线程池中并发读取与解析
+        file_paths = list(raw_data_path.glob("*.jsonl"))
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._read_medical_file, file_path) for file_path in file_paths),
+            return_exceptions=True
+        )
+        new_docs = []
+        for file_path, result in zip(file_paths, results):
+            if isinstance(result, Exception):
+                logger.error(f"导入数据失败 {file_path}: {str(result)}")
+            else:
+                new_docs.extend(result)
+        # 在事件循环线程中统一去重，重复爬取的文章不再编码
+        new_docs = self._dedupe(new_docs)
                 
+        # 只编码新增文档并追加到索引，已有文档不再重新编码
+        if new_docs:
+            await asyncio.to_thread(self._add_documents, new_docs)
+            
     def _process_medical_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """处理医疗数据"""
         try:
-            processed_data = {
-                "title": data.get("title", ""),
-                "content": data.get("content", "") or data.get("abstract", ""),
-                "source": data.get("source", ""),
-                "url": data.get("url", ""),
-                "type": data.get("type", "article"),
-                "keyword": data.get("keyword", ""),
-                "timestamp": data.get("crawl_time", "")
+            get = data.get  # 每条记录只查找一次绑定方法
+            return {
+                "title": get("title", ""),
+                "content": get("content", "") or get("abstract", "") or get("summary", ""),
+                "source": get("source", ""),
+                "url": get("url", ""),
+                "type": get("type", "article"),
+                "keyword": get("keyword", ""),
+                "timestamp": get("crawl_time", "")
             }
-            return processed_data
         except Exception as e:
             logger.error(f"处理数据失败: {str(e)}")
             return None
 
+    def _read_medical_file(self, file_path: Path) -> List[Dict[str, Any]]:
+        """读取 JSONL 数据文件并逐条处理"""
+        processed_data = []
+        with open(file_path, 'rb', buffering=self.READ_BUFFER_SIZE) as f:
+            for line in f:
+                processed = self._process_medical_data(orjson.loads(line))
+                if processed:
+                    processed_data.append(processed)
+        return processed_data
+        
     async def process_medical_data(self, file_path: Path) -> List[Dict[str, Any]]:
         """处理医疗数据文件"""
-        processed_data = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line)
-                    processed = self._process_medical_data(data)
-                    if processed:
-                        processed_data.append(processed)
-            return processed_data
+            return await asyncio.to_thread(self._read_medical_file, file_path)
         except Exception as e:
             logger.error(f"处理文件失败 {file_path}: {str(e)}")
             return []
@@ -212,19 +659,13 @@ class KnowledgeManager:
         # 解析血压值
         systolic, diastolic = map(int, bp.split('/'))
         
-        # 判断高血压等级
-        if 160 <= systolic < 180 or 100 <= diastolic < 110:
-            risk_level = "2级高血压"
-        elif systolic >= 180 or diastolic >= 110:
-            risk_level = "3级高血压"
-        elif 140 <= systolic < 160 or 90 <= diastolic < 100:
-            risk_level = "1级高血压"
-        else:
-            risk_level = "正常"
+        # 判断高血压等级：收缩压、舒张压分别分级，取较高者
+        grade = max(bisect_right(_SYSTOLIC_THRESHOLDS, systolic), bisect_right(_DIASTOLIC_THRESHOLDS, diastolic))
+        risk_level = _BP_LEVELS[grade]
 
         return {
-            "primary_symptoms": [s for s in symptoms if s in self.medical_rules["高血压"]["symptoms"]["primary"]],
-            "secondary_symptoms": [s for s in symptoms if s in self.medical_rules["高血压"]["symptoms"]["secondary"]],
+            "primary_symptoms": [s for s in symptoms if s in self._primary_set],
+            "secondary_symptoms": [s for s in symptoms if s in self._secondary_set],
             "risk_level": risk_level,
             "related_diseases": ["高血压", "心血管疾病"]
         }
@@ -255,17 +696,10 @@ class KnowledgeManager:
         try:
             # 重新构建索引
             texts = [doc["content"] for doc in self.documents]
-            embeddings = self.encoder.encode(texts)
+            embeddings = self._encode_documents(texts)
             
-            # 获取向量维度
-            vector_dim = embeddings.shape[1]
-            
-            # 创建新索引
-            self.index = faiss.IndexFlatL2(vector_dim)
-            
-            # 添加向量到索引
-            embeddings_array = np.array(embeddings).astype('float32')
-            self.index.add(embeddings_array)
+            # 创建新索引并添加向量
+            self._index_embeddings(embeddings)
             
             logger.info(f"索引更新完成，当前包含 {len(self.documents)} 个文档")
             
@@ -273,6 +707,31 @@ class KnowledgeManager:
             logger.error(f"更新索引失败: {str(e)}")
             raise
 
+    def _add_documents(self, new_docs: List[Dict[str, Any]]):
+        """编码新增文档并追加到索引"""
+        if self.index is None or self.index.ntotal == 0 or self.index.ntotal != len(self.documents):
+            # 索引尚未与文档对齐时整体重建
+            self.documents.extend(new_docs)
+            self._update_index()
+        else:
+            embeddings = np.ascontiguousarray(self._encode_documents([doc["content"] for doc in new_docs]), dtype='float32')
+            # 持锁原位追加，检索线程不会读到追加到一半的索引
+            with self._index_guard:
+                self._cpu_index.add(embeddings)
+                if self.index is not self._cpu_index:
+                    try:
+                        self.index.add(embeddings)  # GPU 副本同步追加
+                    except Exception as e:
+                        logger.warning(f"GPU 索引追加失败，重新复制: {str(e)}")
+                        self.index = self._to_device(self._cpu_index)
+                self.documents.extend(new_docs)
+                self._refresh_docs_arr()
+            logger.info(f"新增 {len(new_docs)} 个文档，当前包含 {len(self.documents)} 个文档")
+            
+        # 追加后的索引写回缓存，下次启动不会加载到旧索引
+        if self._index_fingerprint is not None:
+            self._save_index_cache(self._index_fingerprint)
+        
     def _initialize_default_documents(self):
         """初始化默认医学文档"""
         default_docs = [
@@ -306,4 +765,4 @@ class KnowledgeManager:
                 "type": "treatment"
             }
         ]
-        self.documents.extend(default_docs)
\ No newline at end of file
+        self.documents.extend(self._dedupe(default_docs))
\ No newline at end of file
@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+from transformers import AutoTokenizer
+from optimum.exporters.onnx import main_export
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_FILE = "model.onnx"
+QUANTIZED_FILE = "model_quantized.onnx"
+
+def export_encoder(save_dir: Path, quantize: bool = True):
+    """导出 ONNX 模型到 save_dir，并生成 int8 动态量化版本供 CPU 使用"""
+    save_dir = Path(save_dir)
+    main_export(MODEL_ID, output=save_dir, task="feature-extraction", opset=17)
+    if quantize:
+        quantizer = ORTQuantizer.from_pretrained(save_dir, file_name=ONNX_FILE)
+        quantizer.quantize(
+            save_dir=save_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+
+class OnnxEncoder:
+    """all-MiniLM-L6-v2 的 ONNX Runtime 版本，接口与 SentenceTransformer.encode 兼容"""
+    
+    def __init__(self, save_dir: Path, file_name: str = QUANTIZED_FILE,
+                 provider: str = "CPUExecutionProvider", max_length: int = 256):
+        save_dir = Path(save_dir)
+        if not (save_dir / file_name).exists():
+            raise FileNotFoundError(f"{save_dir / file_name} 不存在，请先运行 scripts/export_encoder.py 导出")
+        self.model = ORTModelForFeatureExtraction.from_pretrained(save_dir, file_name=file_name, provider=provider)
+        self.tokenizer = AutoTokenizer.from_pretrained(save_dir)
+        self.max_length = max_length
+        self.device = self.model.device
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """编码句子，返回 float32 向量；输入单个字符串时返回一维向量"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            # 按 attention_mask 做均值池化，与 SentenceTransformer 的池化层一致
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        
+        if batches:
+            embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+        else:
+            embeddings = np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
@@ -1,21 +1,219 @@
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
+import chromadb
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+import numpy as np
+from functools import lru_cache
+from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any
 from config.config import Config
 
 class VectorStoreManager:
-    def __init__(self, config):
+    # k 不超过该值时直接在内存映射向量上精确检索，更大的 k 交给 Chroma
+    MMAP_SEARCH_MAX_K = 100
+    
+    def __init__(self, config, encoder=None):
         self.config = config
-        self.embeddings = OpenAIEmbeddings(verify=False)
-        self.vector_store = None
-        
+        # 可传入 KnowledgeManager 已加载的编码器（同为 all-MiniLM-L6-v2），避免重复加载模型
+        self.model = encoder if encoder is not None else SentenceTransformer('all-MiniLM-L6-v2')
+        self.client = None
+        self.collection = None
+        self.dim = self.model.get_sentence_embedding_dimension()
+        # 向量按行量化为 int8 顺序存放在内存映射文件中，缩放系数、元数据及行号存放在 SQLite
+        self.mmap_path = self.config.VECTOR_DB_PATH / 'embeddings.i8'
+        self.meta_db = None
+        self._scales = None  # 缩放系数的内存缓存，写入后失效
+        self._init_lock = threading.Lock()
+        # 常见问题会被反复查询，缓存其向量（按实例缓存，随实例释放）
+        self._encode_query = lru_cache(maxsize=1024)(self._encode_query_uncached)
+    
     def initialize_store(self):
-        self.vector_store = Chroma(
-            persist_directory=str(self.config.VECTOR_DB_PATH),
-            embedding_function=self.embeddings
+        self.client = chromadb.PersistentClient(path=str(self.config.VECTOR_DB_PATH))
+        collection = self.client.get_or_create_collection(
+            "medical_articles",
+            metadata={"hnsw:space": "cosine"}
         )
+        # WAL 模式持久保存在数据库文件上，批量写入时不阻塞读
+        # sqlite3 连接的 with 只管事务不关连接，用 closing 确保释放句柄
+        with closing(sqlite3.connect(self.config.VECTOR_DB_PATH / "chroma.sqlite3")) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+        
+        self.meta_db = sqlite3.connect(self.config.VECTOR_DB_PATH / "embeddings_meta.sqlite3", check_same_thread=False)
+        self.meta_db.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 只在检查点时 fsync，掉电最多丢失最近的提交，向量文件可由原始数据重建
+        self.meta_db.execute("PRAGMA synchronous=NORMAL")
+        self.meta_db.execute("PRAGMA temp_store=MEMORY")
+        self.meta_db.execute("PRAGMA cache_size=-64000")
+        with self.meta_db:
+            self.meta_db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "id TEXT PRIMARY KEY, row INTEGER UNIQUE, scale REAL, title TEXT, source TEXT, document TEXT)"
+            )
+            # 覆盖索引：加载缩放系数时只扫描索引页，不读取存放正文的表页
+            self.meta_db.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_row_scale ON embeddings(row, scale)")
+        # 最后再赋值，其他线程看到 collection 时其余资源已就绪
+        self.collection = collection
+    
+    def _init_and_get(self):
+        """加锁完成延迟初始化，返回集合"""
+        with self._init_lock:
+            if self.collection is None:
+                self.initialize_store()
+        return self.collection
+    
+    @staticmethod
+    def _article_text(article: Dict[str, Any]) -> str:
+        """拼接文章标题与正文（各数据源的正文字段名不同）"""
+        body = article.get('content') or article.get('abstract') or article.get('summary') or ""
+        return f"{article.get('title', '')}\n{body}"
+    
+    def add_articles(self, articles: List[Dict[str, Any]], batch_size: int = 200):
+        """批量编码爬取的文章，按 batch_size 分批写入向量库"""
+        collection = self.collection
+        if collection is None:
+            collection = self._init_and_get()
+        encode = self.model.encode
+        
+        # 以 URL 为 ID 去重，无 URL 时使用文本哈希
+        docs = {}
+        for article in articles:
+            text = self._article_text(article)
+            doc_id = article.get('url') or hashlib.md5(text.encode('utf-8')).hexdigest()
+            docs[doc_id] = (text, article)
+        if not docs:
+            return
+        
+        ids = list(docs)
+        texts = [text for text, _ in docs.values()]
+        # encode 内部已按长度排序分批，只在批内 padding
+        embeddings = np.asarray(encode(
+            texts,
+            batch_size=64,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ), dtype=np.float32)  # GPU 上的编码器以 float16 推理
+        metadatas = [
+            {'source': article.get('source', ''), 'title': article.get('title', '')}
+            for _, article in docs.values()
+        ]
+        self._write_embeddings(ids, embeddings, texts, metadatas)
+        
+        # Chroma 作为大 k 查询与召回校验的后备，每批一次事务和一次 HNSW 更新
+        for i in range(0, len(ids), batch_size):
+            collection.upsert(
+                ids=ids[i:i + batch_size],
+                embeddings=embeddings[i:i + batch_size],
+                documents=texts[i:i + batch_size],
+                metadatas=metadatas[i:i + batch_size]
+            )
+    
+    def _num_rows(self) -> int:
+        return self.mmap_path.stat().st_size // self.dim if self.mmap_path.exists() else 0
+    
+    @staticmethod
+    def _quantize(emb: np.ndarray):
+        """按行对称量化为 int8，返回 (int8 向量, float32 缩放系数)"""
+        scales = np.abs(emb).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        emb_q = np.round(emb / scales[:, None]).astype(np.int8)
+        return emb_q, scales.astype(np.float32)
+    
+    def _load_scales(self, n: int) -> np.ndarray:
+        if self._scales is None or len(self._scales) != n:
+            scales = np.ones(n, dtype=np.float32)
+            for row, scale in self.meta_db.execute("SELECT row, scale FROM embeddings"):
+                scales[row] = scale
+            self._scales = scales
+        return self._scales
+    
+    def _write_embeddings(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """写入内存映射向量文件：已有 ID 原位覆盖，新 ID 顺序追加到文件末尾"""
+        embeddings, scales = self._quantize(embeddings)
+        existing = {}
+        for i in range(0, len(ids), 500):  # 控制单条 SQL 的参数个数
+            chunk = ids[i:i + 500]
+            existing.update(self.meta_db.execute(
+                f"SELECT id, row FROM embeddings WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        
+        next_row = self._num_rows()
+        rows = []
+        for doc_id in ids:
+            if doc_id in existing:
+                rows.append(existing[doc_id])
+            else:
+                rows.append(next_row)
+                next_row += 1
+        rows = np.asarray(rows)
+        
+        # 先把文件扩展到新的行数，再统一按行号写入
+        with open(self.mmap_path, 'ab') as f:
+            f.truncate(next_row * self.dim)
+        mmap = np.memmap(self.mmap_path, dtype=np.int8, mode='r+', shape=(next_row, self.dim))
+        mmap[rows] = embeddings
+        mmap.flush()
+        del mmap
+        
+        with self.meta_db:
+            self.meta_db.executemany(
+                "INSERT OR REPLACE INTO embeddings (id, row, scale, title, source, document) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (doc_id, int(row), float(scale), meta['title'], meta['source'], text)
+                    for doc_id, row, scale, text, meta in zip(ids, rows, scales, texts, metadatas)
+                ]
+            )
+        # 只在统计信息过期的表上重新 ANALYZE，让查询规划器选用覆盖索引
+        self.meta_db.execute("PRAGMA optimize")
+        self._scales = None
+    
+    def _search_mmap(self, query_embedding: np.ndarray, k: int, block: int = 65536) -> List[Dict[str, Any]]:
+        """在 int8 内存映射向量上分块做矩阵乘并乘回缩放系数，取内积最大的 k 条"""
+        n = self._num_rows()
+        if n == 0:
+            return []
+        emb = np.memmap(self.mmap_path, dtype=np.int8, mode='r', shape=(n, self.dim))
+        scales = self._load_scales(n)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, block):
+            scores[start:start + block] = emb[start:start + block].astype(np.float32) @ query_embedding
+        scores *= scales
+        
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
         
+        rows = {
+            row: (document, title, source)
+            for row, document, title, source in self.meta_db.execute(
+                f"SELECT row, document, title, source FROM embeddings WHERE row IN ({','.join('?' * k)})",
+                [int(r) for r in top]
+            )
+        }
+        return [
+            {
+                'content': rows[row][0],
+                'metadata': {'title': rows[row][1], 'source': rows[row][2]},
+                'distance': 1.0 - float(scores[row])  # 与 Chroma 的余弦距离保持一致
+            }
+            for row in top.tolist() if row in rows
+        ]
+    
+    def _encode_query_uncached(self, query: str) -> bytes:
+        """编码查询，以 float16 字节保存以减小缓存占用"""
+        embedding = self.model.encode([query], normalize_embeddings=True)[0]
+        return embedding.astype(np.float16).tobytes()
+    
     async def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        if not self.vector_store:
-            self.initialize_store()
-        return await self.vector_store.similarity_search_async(query, k=k)
\ No newline at end of file
+        collection = self.collection
+        if collection is None:
+            collection = self._init_and_get()
+        query_embedding = np.frombuffer(self._encode_query(query), dtype=np.float16).astype(np.float32)
+        if k <= self.MMAP_SEARCH_MAX_K and self._num_rows():
+            return self._search_mmap(query_embedding, k)
+        results = collection.query(query_embeddings=query_embedding.reshape(1, -1), n_results=k)
+        return [
+            {'content': doc, 'metadata': meta, 'distance': dist}
+            for doc, meta, dist in zip(results['documents'][0], results['metadatas'][0], results['distances'][0])
+        ]
@@ -1,17 +1,22 @@
-import asyncio
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 from config.config import Config
-from crawlers.medical_crawler import MedicalCrawler
+from crawlers.medical_crawler import MedicalCrawler, fast_line_count
+from crawlers.http_client import close_session
+from utils.event_loop import run_async
 
-# 配置日志
+# 配置日志：实际的文件/终端输出在后台线程完成，日志调用不阻塞事件循环
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler('crawler.log'), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('crawler.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 
 async def main():
@@ -47,7 +52,7 @@ async def main():
         logging.info("\n爬取结果：")
         total_records = 0
         for file in files:
-            line_count = sum(1 for _ in open(file, 'r', encoding='utf-8'))
+            line_count = fast_line_count(file)
             total_records += line_count
             logging.info(f"{file.name}: {line_count} 条记录")
             
@@ -56,6 +61,12 @@ async def main():
     except Exception as e:
         logging.error(f"爬虫运行出错: {str(e)}", exc_info=True)
         raise e
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    log_listener.start()
+    try:
+        run_async(main())
+    finally:
+        log_listener.stop() 
\ No newline at end of file
@@ -0,0 +1,16 @@
+import logging
+from config.config import Config
+from knowledge_base.onnx_encoder import export_encoder
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """导出知识库句向量编码器的 ONNX 模型（GPU 用 fp32 版本，CPU 用 int8 量化版本）"""
+    save_dir = Config.STORAGE_PATHS["onnx_encoder"]
+    save_dir.mkdir(parents=True, exist_ok=True)
+    export_encoder(save_dir)
+    logger.info(f"编码器已导出到 {save_dir}")
+
+if __name__ == "__main__":
+    main()
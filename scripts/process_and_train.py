@@ -1,11 +1,13 @@
 import asyncio
 import logging
+import orjson
 from pathlib import Path
 from config.config import Config
 from knowledge_base.knowledge_manager import KnowledgeManager
 from knowledge_base.vector_store import VectorStoreManager
 from training.lora_trainer import LoRATrainer
 from agents.report_generation_agent import ReportGenerationAgent
+from utils.event_loop import run_async
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,7 +16,7 @@ class MedicalSystemProcessor:
     def __init__(self):
         self.config = Config
         self.knowledge_mgr = KnowledgeManager(self.config)
-        self.vector_store = VectorStoreManager(self.config)
+        self.vector_store = VectorStoreManager(self.config, encoder=self.knowledge_mgr.encoder)
         
     async def process_knowledge_base(self):
         """处理知识库数据"""
@@ -26,8 +28,12 @@ class MedicalSystemProcessor:
         # 2. 导入爬取的数据
         await self.knowledge_mgr.import_crawled_data()
         
-        # 3. 构建向量索引
-        self.vector_store.initialize_store()
+        # 3. 构建向量索引（批量编码所有爬取的文章）
+        articles = []
+        for file in self.config.STORAGE_PATHS["raw_data"].glob("*.jsonl"):
+            with open(file, 'rb') as f:
+                articles.extend(orjson.loads(line) for line in f if line.strip())
+        self.vector_store.add_articles(articles)
         
         logger.info("知识库处理完成")
         
@@ -39,18 +45,20 @@ class MedicalSystemProcessor:
         raw_data_path = self.config.STORAGE_PATHS["raw_data"]
         
         try:
-            for file in raw_data_path.glob("*.jsonl"):
-                # 处理每个文件
-                processed_data = await self.knowledge_mgr.process_medical_data(file)
-                if processed_data:
-                    # 转换为训练格式
-                    for item in processed_data:
-                        train_example = {
-                            "text": f"标题：{item['title']}\n内容：{item['content']}",
-                            "source": item['source'],
-                            "type": item['type']
-                        }
-                        train_data.append(train_example)
+            # 各文件在线程池中并发读取与解析
+            results = await asyncio.gather(
+                *(self.knowledge_mgr.process_medical_data(file) for file in raw_data_path.glob("*.jsonl"))
+            )
+            for processed_data in results:
+                # 转换为训练格式
+                train_data.extend(
+                    {
+                        "text": f"标题：{item['title']}\n内容：{item['content']}",
+                        "source": item['source'],
+                        "type": item['type']
+                    }
+                    for item in processed_data
+                )
                 
             logger.info(f"准备了 {len(train_data)} 条训练数据")
             return train_data
@@ -117,4 +125,4 @@ async def main():
     await processor.run()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    run_async(main()) 
\ No newline at end of file
@@ -1,14 +1,14 @@
-import asyncio
 import sys
-import os
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from crawlers.medical_crawler import MedicalCrawler
+from crawlers.medical_crawler import MedicalCrawler, fast_line_count
+from crawlers.http_client import close_session
 from config.config import Config
+from utils.event_loop import run_async
 
 async def main():
     # 医学关键词列表（中英文对照）
@@ -56,10 +56,7 @@ async def main():
     ]
     
     try:
-        # 确保存储目录存在
-        os.makedirs(Config.STORAGE_PATHS["raw_data"], exist_ok=True)
-        
-        # 初始化爬虫
+        # 初始化爬虫（存储目录由爬虫的写入协程创建）
         crawler = MedicalCrawler(Config)
         print(f"开始爬取数据，关键词：{[k['zh'] for k in keywords]}")
         
@@ -73,12 +70,14 @@ async def main():
         
         print("\n爬取结果：")
         for file in files:
-            line_count = sum(1 for _ in open(file, 'r', encoding='utf-8'))
+            line_count = fast_line_count(file)
             print(f"{file.name}: {line_count} 条记录")
             
     except Exception as e:
         print(f"爬虫运行出错: {str(e)}")
         raise e
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    run_async(main()) 
\ No newline at end of file
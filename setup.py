@@ -12,9 +12,24 @@ setup(
         "faiss-cpu",
         "numpy",
         "pandas",
-        "chromadb",
+        "chromadb>=0.5.0",
         "langchain-community>=0.0.10",
         "langchain-core>=0.1.0",
-        "langchain>=0.1.0"
-    ]
+        "langchain>=0.1.0",
+        "aiohttp-client-cache[sqlite]",
+        "aiofiles",
+        "lxml",
+        "cssselect",
+        "orjson",
+        "brotli",
+        "aiolimiter",
+        "pyahocorasick",
+        "numba"
+    ],
+    extras_require={
+        # CPU 环境下使用 int8 量化的句向量编码器
+        "onnx": ["optimum[onnxruntime]"],
+        # 爬虫入口可选的高性能事件循环
+        "uvloop": ["uvloop; sys_platform != 'win32'"]
+    }
 ) 
\ No newline at end of file
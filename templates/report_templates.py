@@ -1,18 +1,16 @@
 from typing import Dict, Any
 
 class ReportTemplates:
-    @staticmethod
-    def get_template(report_type: str) -> str:
-        """获取报告模板"""
-        templates = {
-            "初步诊断报告": """
+    # 模板在类加载时构建一次，不随每次调用重建
+    TEMPLATES = {
+        "初步诊断报告": """
 主诉：{chief_complaint}
 现病史：{present_illness}
 体格检查：{physical_exam}
 初步诊断：{diagnosis}
 治疗建议：{treatment}
 """,
-            "住院记录": """
+        "住院记录": """
 入院时间：{admission_time}
 科室：{department}
 主诉：{chief_complaint}
@@ -23,7 +21,7 @@ class ReportTemplates:
 诊断：{diagnosis}
 治疗计划：{treatment_plan}
 """,
-            "手术记录": """
+        "手术记录": """
 手术日期：{operation_date}
 手术名称：{operation_name}
 手术医师：{surgeon}
@@ -32,5 +30,9 @@ class ReportTemplates:
 手术结果：{operation_result}
 注意事项：{notes}
 """
-        }
-        return templates.get(report_type, "") 
\ No newline at end of file
+    }
+    
+    @classmethod
+    def get_template(cls, report_type: str) -> str:
+        """获取报告模板"""
+        return cls.TEMPLATES.get(report_type, "")
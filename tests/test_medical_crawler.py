@@ -0,0 +1,149 @@
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import orjson
+
+try:
+    from crawlers.medical_crawler import MedicalCrawler
+except ImportError as e:  # 爬虫依赖（aiohttp、aiofiles 等）未安装
+    MedicalCrawler = None
+    _import_error = str(e)
+else:
+    _import_error = ""
+
+
+class _Config:
+    def __init__(self, raw_data: Path):
+        self.STORAGE_PATHS = {"raw_data": raw_data}
+        self.CRAWLER_CONFIG = {"rate_limits": {"default": (1, 2), "eutils.ncbi.nlm.nih.gov": (3, 1)}}
+
+
+@unittest.skipIf(MedicalCrawler is None, f"爬虫依赖未安装: {_import_error}")
+class SaveResultsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_second_save_gets_uuid_suffix(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            crawler = MedicalCrawler(_Config(Path(tmp)))
+            first = await crawler.save_results([{"title": "a"}], "pubmed.jsonl")
+            second = await crawler.save_results([{"title": "b"}], "pubmed.jsonl")
+            
+            self.assertEqual(first.name, "pubmed.jsonl")
+            self.assertNotEqual(first, second)
+            self.assertRegex(second.name, r"^pubmed_[0-9a-f]{8}\.jsonl$")
+            # 已有文件不被覆盖
+            self.assertEqual(orjson.loads(first.read_bytes()), {"title": "a"})
+            self.assertEqual(orjson.loads(second.read_bytes()), {"title": "b"})
+
+
+@unittest.skipIf(MedicalCrawler is None, f"爬虫依赖未安装: {_import_error}")
+class DedupeByUrlTest(unittest.TestCase):
+    def test_first_record_wins(self):
+        first = {"url": "https://a", "title": "first"}
+        second = {"url": "https://a", "title": "second"}
+        no_url = [{"url": "", "title": "x"}, {"url": "", "title": "y"}]
+        seen = set()
+        
+        unique = MedicalCrawler._dedupe_by_url([first, second, *no_url], seen)
+        
+        self.assertEqual(unique, [first, *no_url])
+        self.assertIs(unique[0], first)
+        self.assertEqual(seen, {"https://a"})
+        
+    def test_skips_seen_urls(self):
+        seen = {"https://a"}
+        records = [{"url": "https://a", "title": "old"}, {"url": "https://b", "title": "new"}]
+        
+        self.assertEqual(MedicalCrawler._dedupe_by_url(records, seen), records[1:])
+        self.assertEqual(seen, {"https://a", "https://b"})
+
+
+@unittest.skipIf(MedicalCrawler is None, f"爬虫依赖未安装: {_import_error}")
+class FetchCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        MedicalCrawler.invalidate_fetch_cache()
+        self.addCleanup(MedicalCrawler.invalidate_fetch_cache)
+        self.calls = []
+        self.results = {"hit": [{"url": "https://a", "title": "a"}], "miss": []}
+        
+    def _crawler(self):
+        crawler = MedicalCrawler(_Config(Path(tempfile.gettempdir())))
+        
+        async def crawl(keywords):
+            self.calls.append(keywords[0])
+            await asyncio.sleep(0)
+            for record in self.results[keywords[0]]:
+                yield record
+                
+        crawler._crawl_func = lambda source: crawl
+        return crawler
+        
+    async def test_shared_across_instances(self):
+        first = await self._crawler()._fetch_one("nih", "hit")
+        second = await self._crawler()._fetch_one("nih", "hit")
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, ["hit"])
+        
+    async def test_concurrent_requests_fetch_once(self):
+        crawler = self._crawler()
+        results = await asyncio.gather(*(crawler._fetch_one("nih", "hit") for _ in range(3)))
+        
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(self.calls, ["hit"])
+        
+    async def test_ttl_expiry(self):
+        crawler = self._crawler()
+        with mock.patch.object(MedicalCrawler, "FETCH_TTL", 0.05):
+            await crawler._fetch_one("nih", "hit")
+            await crawler._fetch_one("nih", "hit")
+            self.assertEqual(self.calls, ["hit"])
+            
+            await asyncio.sleep(0.1)
+            await crawler._fetch_one("nih", "hit")
+        self.assertEqual(self.calls, ["hit", "hit"])
+        
+    async def test_empty_result_not_cached(self):
+        crawler = self._crawler()
+        self.assertEqual(await crawler._fetch_one("nih", "miss"), ())
+        
+        self.results["miss"] = [{"url": "https://b", "title": "b"}]
+        self.assertEqual(len(await crawler._fetch_one("nih", "miss")), 1)
+        self.assertEqual(self.calls, ["miss", "miss"])
+        
+    async def test_explicit_invalidation(self):
+        crawler = self._crawler()
+        await crawler._fetch_one("nih", "hit")
+        MedicalCrawler.invalidate_fetch_cache("nih", "hit")
+        await crawler._fetch_one("nih", "hit")
+        
+        self.assertEqual(self.calls, ["hit", "hit"])
+
+
+@unittest.skipIf(MedicalCrawler is None, f"爬虫依赖未安装: {_import_error}")
+class ThrottleTest(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_limited_to_per_second_cap(self):
+        crawler = MedicalCrawler(_Config(Path(tempfile.gettempdir())))
+        url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+        
+        start = asyncio.get_running_loop().time()
+        for _ in range(4):
+            await crawler._throttle(url)
+        elapsed = asyncio.get_running_loop().time() - start
+        
+        limiter = crawler._host_limiters["eutils.ncbi.nlm.nih.gov"]
+        self.assertEqual((limiter.max_rate, limiter.time_period), (3, 1))
+        # 前 3 次立即放行，第 4 次需等待令牌恢复
+        self.assertGreater(elapsed, 0.2)
+        
+    async def test_unknown_host_uses_default(self):
+        crawler = MedicalCrawler(_Config(Path(tempfile.gettempdir())))
+        await crawler._throttle("https://www.cdc.gov/search")
+        
+        limiter = crawler._host_limiters["www.cdc.gov"]
+        self.assertEqual((limiter.max_rate, limiter.time_period), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
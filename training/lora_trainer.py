@@ -1,7 +1,14 @@
-from transformers import Trainer, TrainingArguments, AutoModelForCausalLM, AutoTokenizer
-from peft import get_peft_model, LoraConfig, TaskType
+import os
+# 在首次分配显存前生效：可扩展段减少长时间训练中的显存碎片
+os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True,garbage_collection_threshold:0.8')
+from transformers import Trainer, TrainingArguments, AutoModelForCausalLM, AutoTokenizer, DataCollatorForLanguageModeling, BitsAndBytesConfig
+from peft import get_peft_model, prepare_model_for_kbit_training, LoraConfig, TaskType
 import torch
 import logging
+import hashlib
+import shutil
+import orjson
+from contextlib import nullcontext
 from pathlib import Path
 from datasets import Dataset
 
@@ -13,6 +20,11 @@ class LoRATrainer:
         self.model = None
         self.tokenizer = None
         self.peft_config = None
+        self._collator = None
+        self._regions_compiled = False
+        # Ampere 及以上的 GPU 支持 bf16：动态范围与 fp32 相同，不需要损失缩放
+        self.use_bf16 = torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+        self.compute_dtype = torch.bfloat16 if self.use_bf16 else torch.float16
         # 初始化时加载模型和分词器
         self._load_base_model()
         
@@ -33,15 +45,30 @@ class LoRATrainer:
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
             
-            # 加载模型
+            # 加载模型：QLoRA，基座权重以 4-bit NF4 存储（双重量化），显存约为 int8 的一半
+            quantization_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_compute_dtype=self.compute_dtype
+            )
             self.model = AutoModelForCausalLM.from_pretrained(
                 local_model_path,
                 trust_remote_code=True,
-                device_map="auto",
-                torch_dtype=torch.float16,
+                # 4-bit 的 7B 模型单卡可容纳，整模放在当前进程的 GPU 上，不经 accelerate 的跨卡分片钩子；
+                # 多卡训练时每个进程各放一份
+                device_map={"": int(os.environ.get("LOCAL_RANK", 0))},
+                torch_dtype=self.compute_dtype,
                 local_files_only=True,
-                load_in_8bit=True
+                quantization_config=quantization_config
             )
+            # 量化模型训练前的准备：LayerNorm 等转为 fp32，同时开启梯度检查点
+            self.model = prepare_model_for_kbit_training(self.model, use_gradient_checkpointing=True)
+            # 远程代码的 Baichuan 沿用旧版 _set_gradient_checkpointing，会忽略 use_reentrant 参数而走重入式检查点；
+            # 重入式检查点要求输入带梯度，否则检查点内的 LoRA 参数拿不到梯度，这里显式开启
+            self.model.enable_input_require_grads()
+            # 训练时不需要 KV 缓存，开启时会与梯度检查点冲突
+            self.model.config.use_cache = False
             
             # 设置为训练模式
             self.model.train()
@@ -75,31 +102,58 @@ class LoRATrainer:
             # 打印可训练参数信息
             self.model.print_trainable_parameters()
             
+            if self.config.TRAINING_CONFIG.get("compile_regions", False):
+                self._compile_regions()
+            
         except Exception as e:
             logger.error(f"配置 LoRA 失败: {str(e)}")
             raise
         
+    def _compile_regions(self):
+        """只编译 MLP 与 RMSNorm 子模块：注意力层的 past_key_values 等参数会让整模编译断图"""
+        if not hasattr(torch.nn.Module, "compile"):
+            return
+        compiled = 0
+        for module in self.model.modules():
+            if type(module).__name__.endswith(("MLP", "RMSNorm")):
+                # 原地编译，模块结构与 state_dict 的键名不变，LoRA 权重照常保存
+                module.compile(dynamic=True)
+                compiled += 1
+        self._regions_compiled = compiled > 0
+        logger.info(f"已编译 {compiled} 个 MLP/RMSNorm 子模块")
+        
     def _prepare_dataset(self, data):
-        """准备训练数据集"""
+        """准备训练数据集；编码结果按内容缓存到磁盘，数据不变时直接内存映射加载"""
         try:
+            # 完全相同的文本只保留第一次出现的（dict 保持插入顺序）
+            texts = list(dict.fromkeys(item["text"] for item in data))
+            if len(texts) < len(data):
+                logger.info(f"训练文本去重：{len(data)} -> {len(texts)}")
+            max_length = self.config.TRAINING_CONFIG["max_length"]
+            
+            key = hashlib.sha1(orjson.dumps([texts, self.tokenizer.name_or_path, max_length])).hexdigest()[:16]
+            cache_path = self.config.STORAGE_ROOT / "tokenized" / key
+            if cache_path.exists():
+                logger.info(f"从缓存加载编码后的训练数据: {cache_path}")
+                return Dataset.load_from_disk(str(cache_path))
+            
             # 转换为 HuggingFace Dataset 格式
-            dataset = Dataset.from_dict({
-                "text": [item["text"] for item in data]
-            })
+            dataset = Dataset.from_dict({"text": texts})
+            
+            # 对数据进行编码（闭包只引用分词器，多进程编码时不会序列化模型）
+            tokenizer = self.tokenizer
             
-            # 对数据进行编码
             def tokenize_function(examples):
                 # 使用分词器处理文本
-                outputs = self.tokenizer(
+                # 这里不补齐，由 collator 按批次补齐；标签也由 collator 生成
+                outputs = tokenizer(
                     examples["text"],
-                    padding="max_length",
                     truncation=True,
-                    max_length=512,
+                    max_length=max_length,
                     return_tensors=None  # 确保返回列表而不是张量
                 )
-                
-                # 创建标签，用于计算损失
-                outputs["labels"] = outputs["input_ids"].copy()
+                # 记录长度，供按长度分桶采样
+                outputs["length"] = [len(ids) for ids in outputs["input_ids"]]
                 
                 return outputs
             
@@ -107,9 +161,17 @@ class LoRATrainer:
             tokenized_dataset = dataset.map(
                 tokenize_function,
                 batched=True,
+                batch_size=1000,
+                num_proc=self.config.TRAINING_CONFIG.get("tokenize_num_proc"),
                 remove_columns=dataset.column_names
             )
             
+            # 先写临时目录再改名，中途失败不会留下可命中的缓存
+            tmp_path = cache_path.with_name(f"{key}.tmp")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            tokenized_dataset.save_to_disk(str(tmp_path))
+            tmp_path.rename(cache_path)
+            
             return tokenized_dataset
             
         except Exception as e:
@@ -117,23 +179,27 @@ class LoRATrainer:
             raise
         
     def _collate_fn(self, examples):
-        """数据批处理函数"""
-        batch = {
-            "input_ids": torch.tensor([ex["input_ids"] for ex in examples]),
-            "attention_mask": torch.tensor([ex["attention_mask"] for ex in examples]),
-            "labels": torch.tensor([ex["labels"] for ex in examples])  # 添加标签
-        }
-        return batch
+        """数据批处理函数：补齐到本批次最长（8 的倍数），padding 位置的标签置为 -100"""
+        # length 列只用于分桶，不传给模型
+        return self._collator([
+            {"input_ids": ex["input_ids"], "attention_mask": ex["attention_mask"]}
+            for ex in examples
+        ])
         
     def train(self, train_dataset, **kwargs):
         """训练模型"""
         try:
+            training_config = self.config.TRAINING_CONFIG
+            num_workers = training_config.get("dataloader_num_workers", 0)
+            # 小批次 + 多步累积：峰值显存低，数据加载与计算重叠更好
+            world_size = int(os.environ.get("WORLD_SIZE", 1))
+            grad_accum = max(1, training_config["global_batch_size"] // (training_config["batch_size"] * world_size))
             # 设置训练参数
             training_args = TrainingArguments(
                 output_dir=kwargs.get('output_dir', self.config.STORAGE_ROOT / "lora_weights"),
                 num_train_epochs=self.config.TRAINING_CONFIG["num_epochs"],
                 per_device_train_batch_size=self.config.TRAINING_CONFIG["batch_size"],
-                gradient_accumulation_steps=self.config.TRAINING_CONFIG["gradient_accumulation_steps"],
+                gradient_accumulation_steps=grad_accum,
                 learning_rate=self.config.TRAINING_CONFIG["learning_rate"],
                 weight_decay=self.config.TRAINING_CONFIG["weight_decay"],
                 warmup_steps=self.config.TRAINING_CONFIG["warmup_steps"],
@@ -141,16 +207,29 @@ class LoRATrainer:
                 logging_steps=self.config.TRAINING_CONFIG["logging_steps"],
                 save_steps=self.config.TRAINING_CONFIG["save_steps"],
                 save_strategy="steps",
-                fp16=self.config.TRAINING_CONFIG["fp16"],
+                bf16=self.use_bf16,
+                fp16=self.config.TRAINING_CONFIG["fp16"] and not self.use_bf16,
+                tf32=self.use_bf16 or None,  # TF32 矩阵乘同样需要 Ampere 及以上
                 logging_dir=self.config.STORAGE_ROOT / "logs",
                 report_to="tensorboard",
+                optim="paged_adamw_8bit",  # 8-bit 优化器状态，显存紧张时分页到内存
                 remove_unused_columns=False,
                 prediction_loss_only=True,
-                label_names=["labels"]
+                label_names=["labels"],
+                # 长度相近的样本分到同一批，减少 padding 上的计算
+                group_by_length=True,
+                ddp_find_unused_parameters=False,  # LoRA 参数每步都参与计算，省去 DDP 的逐参数检查
+                length_column_name="length",
+                # 锁页内存加速拷贝到 GPU；worker 跨 epoch 保留，不重复启动
+                dataloader_num_workers=num_workers,
+                dataloader_pin_memory=True,
+                dataloader_persistent_workers=num_workers > 0,
+                dataloader_prefetch_factor=self.config.TRAINING_CONFIG.get("dataloader_prefetch_factor", 2) if num_workers > 0 else None
             )
             
             # 准备数据集
             dataset = self._prepare_dataset(train_dataset)
+            self._collator = DataCollatorForLanguageModeling(self.tokenizer, mlm=False, pad_to_multiple_of=8)
             
             # 创建训练器
             trainer = Trainer(
@@ -162,7 +241,10 @@ class LoRATrainer:
             )
             
             # 开始训练
-            trainer.train()
+            # 编译在首次前向（及形状变化重新编译）时进行，只在训练期间让编译失败的子模块退回 eager
+            compile_guard = torch._dynamo.config.patch(suppress_errors=True) if self._regions_compiled else nullcontext()
+            with compile_guard:
+                trainer.train()
             
             # 保存模型
             trainer.save_model()
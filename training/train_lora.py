@@ -1,23 +1,20 @@
+from config.config import Config
+from scripts.process_and_train import MedicalSystemProcessor
 from training.lora_trainer import LoRATrainer
-import asyncio
+from utils.event_loop import run_async
 
 async def train_model():
-    # 准备训练数据
-    knowledge_mgr = KnowledgeManager(Config)
-    await knowledge_mgr.initialize()
-    train_data = await knowledge_mgr.prepare_training_data()
+    # 准备训练数据（读取爬取的原始数据，转换为训练格式）
+    train_data = await MedicalSystemProcessor().prepare_training_data()
     
-    # 初始化LoRA训练器
+    # 初始化LoRA训练器（加载基础模型并配置 LoRA）
     trainer = LoRATrainer(Config)
     
-    # 加载基础模型
-    trainer.setup_lora(model)
-    
     # 开始训练
     trainer.train(
         train_dataset=train_data,
-        output_dir=Config.STORAGE_ROOT / "lora_weights"
+        output_dir=str(Config.STORAGE_ROOT / "lora_weights")
     )
 
 if __name__ == "__main__":
-    asyncio.run(train_model()) 
\ No newline at end of file
+    run_async(train_model()) 
\ No newline at end of file
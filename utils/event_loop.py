@@ -0,0 +1,11 @@
+import asyncio
+
+
+def run_async(main):
+    """运行异步入口；安装了 uvloop 时使用基于 libuv 的事件循环，降低大量小请求的调度开销"""
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    return asyncio.run(main)